@@ -0,0 +1,83 @@
+"""Compare decoding throughput of the frame extractor backends on synthetic videos.
+
+Usage:
+    python benchmark-decoders.py [--seconds 60] [--fps 30] [--size 1280x720] [--sample-rate 0.5] [--gop 60]
+
+Reports, for every backend and sampling mode, how many source frames per
+second are processed and how many frames are sampled. Encoding and writing
+are left out so only decoding is measured.
+"""
+import argparse
+import os
+import tempfile
+import time
+from fractions import Fraction
+
+import cv2
+import numpy as np
+
+from frame_extraction import av, open_sampled_frames
+
+def make_frame(i, width, height):
+    # A moving gradient with a frame counter keeps the encoder honest without being pure noise
+    x = np.arange(width, dtype=np.uint16)
+    row = ((x + i * 4) % 256).astype(np.uint8)
+    frame = np.repeat(np.repeat(row[None, :, None], height, axis=0), 3, axis=2)
+    cv2.putText(frame, str(i), (width // 4, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 4, (255, 255, 255), 8)
+    return frame
+
+def write_synthetic_video(path, seconds, fps, width, height, gop):
+    frame_count = int(seconds * fps)
+    if av is not None:
+        # PyAV lets us write H.264 with a fixed GOP, which is what cameras produce
+        with av.open(path, "w") as container:
+            stream = container.add_stream("libx264", rate=Fraction(fps).limit_denominator(1001))
+            stream.width, stream.height, stream.pix_fmt = width, height, "yuv420p"
+            stream.codec_context.gop_size = gop
+            stream.options = {"preset": "ultrafast"}
+            for i in range(frame_count):
+                frame = av.VideoFrame.from_ndarray(make_frame(i, width, height), format="bgr24")
+                for packet in stream.encode(frame):
+                    container.mux(packet)
+            for packet in stream.encode():
+                container.mux(packet)
+    else:
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+        for i in range(frame_count):
+            writer.write(make_frame(i, width, height))
+        writer.release()
+    return frame_count
+
+def time_decoding(video_path, sample_rate, sampling, backend):
+    start = time.perf_counter()
+    sampled = sum(1 for _ in open_sampled_frames(video_path, sample_rate, sampling, backend=backend))
+    return time.perf_counter() - start, sampled
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--sample-rate", type=float, default=0.5)
+    parser.add_argument("--gop", type=int, default=60, help="keyframe interval of the synthetic video (PyAV only)")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.split("x"))
+
+    runs = [("opencv", "grab"), ("opencv", "seek")]
+    if av is not None:
+        runs += [("pyav", "grab"), ("pyav", "seek"), ("pyav", "keyframes")]
+    else:
+        print("PyAV is not installed, only the OpenCV backend is benchmarked.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video_path = os.path.join(tmp, "synthetic.mp4")
+        frame_count = write_synthetic_video(video_path, args.seconds, args.fps, width, height, args.gop)
+        print(f"Synthetic video: {frame_count} frames, {width}x{height} @ {args.fps} fps, "
+              f"sampling at {args.sample_rate} fps\n")
+        print(f"{'backend':<8} {'sampling':<10} {'seconds':>8} {'source fps':>11} {'sampled':>8}")
+        for backend, sampling in runs:
+            elapsed, sampled = time_decoding(video_path, args.sample_rate, sampling, backend)
+            print(f"{backend:<8} {sampling:<10} {elapsed:>8.2f} {frame_count / elapsed:>11.1f} {sampled:>8}")
+
+if __name__ == "__main__":
+    main()
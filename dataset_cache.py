@@ -0,0 +1,224 @@
+"""Persistent file index of a dataset folder, kept in a small SQLite file next to the data.
+
+load_index() lists images/ and labels/ and compares every file's size and
+modification time with the cache. Only new or changed files are read again,
+to summarize a label (box count and class ids) or to hash its contents, so
+a rerun over an untouched dataset reads no file contents at all. With quick
+set, a subfolder whose own modification time is unchanged since the last
+run is not even listed (see refresh).
+
+The cache file is only created in a dataset folder when the caller asks for
+it with create; otherwise an existing one is used, or the index lives in
+memory for the run.
+"""
+import hashlib
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from dataset_index import CACHE_FILES, INDEX_CACHE_NAME, scan_dataset
+
+# xxhash is optional and much faster than the hashlib fallback
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+CACHE_VERSION = 2
+READ_THREADS = 8
+# A folder modification time is only trusted once it is this old, so changes within the
+# filesystem's timestamp granularity of the last run are never missed
+SETTLE_NS = 2 * 10 ** 9
+
+# boxes is the number of label lines and classes the space separated class ids, both None for non-labels.
+# hash is "<algorithm>:<hex digest>" or None when it was never asked for.
+FileEntry = namedtuple("FileEntry", ["size", "mtime_ns", "hash", "boxes", "classes"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT,
+    boxes INTEGER,
+    classes TEXT,
+    PRIMARY KEY (folder, name)
+);
+CREATE TABLE IF NOT EXISTS folders (
+    folder TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+def hash_algorithm():
+    return "xxh3" if xxhash is not None else "blake2b"
+
+def new_digest():
+    return xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b(digest_size=16)
+
+def hash_file(path):
+    """Return "<algorithm>:<hex digest>" of a file, read in chunks."""
+    digest = new_digest()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return f"{hash_algorithm()}:{digest.hexdigest()}"
+
+def hash_data(data):
+    """Return the hash of bytes, comparable to hash_file()."""
+    digest = new_digest()
+    digest.update(data)
+    return f"{hash_algorithm()}:{digest.hexdigest()}"
+
+def summarize_label(data):
+    """Return (box count, space separated sorted class ids) of YOLO label bytes."""
+    classes = set()
+    boxes = 0
+    for line in data.split(b"\n"):
+        parts = line.split(None, 1)
+        if parts:
+            boxes += 1
+            classes.add(parts[0].decode("utf-8", "replace"))
+    return boxes, " ".join(sorted(classes, key=lambda c: (len(c), c)))
+
+def has_cache(folder):
+    return os.path.isfile(os.path.join(folder, INDEX_CACHE_NAME))
+
+def open_cache(folder, create=False):
+    """Open the cache of folder, creating it only with create; in memory if there is none or it is read-only."""
+    if not create and not has_cache(folder):
+        connection = sqlite3.connect(":memory:")
+        connection.executescript(SCHEMA)
+        return connection
+    try:
+        connection = sqlite3.connect(os.path.join(folder, INDEX_CACHE_NAME))
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != CACHE_VERSION:
+            connection.executescript("DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS folders;")
+            connection.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        connection.executescript(SCHEMA)
+    except sqlite3.Error:
+        connection = sqlite3.connect(":memory:")
+        connection.executescript(SCHEMA)
+    return connection
+
+def read_entry(path, is_label, hashes):
+    # Runs on the read threads, only for new or changed files
+    boxes = classes = digest = None
+    if is_label:
+        with open(path, "rb") as f:
+            boxes, classes = summarize_label(f.read())
+    if hashes:
+        digest = hash_file(path)
+    return digest, boxes, classes
+
+def folder_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def refresh(connection, folder, subfolder, hashes=False, threads=READ_THREADS, quick=False):
+    """Bring the cache rows of folder/subfolder up to date and return ({name: FileEntry}, files re-read).
+
+    With quick (and no hashes), a subfolder whose modification time matches
+    the last run is taken from the cache without listing it. Adding, removing
+    or renaming files changes that time; editing a file in place does not, so
+    callers that must see in-place edits leave quick off.
+    """
+    path = os.path.join(folder, subfolder)
+    mtime = folder_mtime(path)
+    cached = {name: FileEntry(*row) for name, *row in connection.execute(
+        "SELECT name, size, mtime_ns, hash, boxes, classes FROM files WHERE folder = ?", (subfolder,))}
+    if quick and not hashes and mtime is not None:
+        row = connection.execute("SELECT mtime_ns FROM folders WHERE folder = ?", (subfolder,)).fetchone()
+        if row is not None and row[0] == mtime:
+            return cached, 0
+    entries, stale = {}, []
+    try:
+        with os.scandir(path) as listing:
+            for item in listing:
+                if not item.is_file() or item.name.startswith(CACHE_FILES):
+                    continue
+                stat = item.stat()
+                entry = cached.pop(item.name, None)
+                if entry is not None and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+                    if hashes and (entry.hash is None or not entry.hash.startswith(hash_algorithm() + ":")):
+                        stale.append((item.name, stat))
+                    else:
+                        entries[item.name] = entry
+                else:
+                    stale.append((item.name, stat))
+    except FileNotFoundError:
+        pass
+
+    def read(name):
+        return read_entry(os.path.join(path, name), name.lower().endswith(".txt"), hashes)
+
+    with ThreadPoolExecutor(max_workers=max(threads, 1)) as pool:
+        for (name, stat), (digest, boxes, classes) in zip(stale, pool.map(read, [name for name, _ in stale])):
+            entries[name] = FileEntry(stat.st_size, stat.st_mtime_ns, digest, boxes, classes)
+    try:
+        with connection:
+            connection.executemany("DELETE FROM files WHERE folder = ? AND name = ?",
+                                   [(subfolder, name) for name in cached])
+            connection.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   [(subfolder, name) + tuple(entries[name]) for name, _ in stale])
+            connection.execute("DELETE FROM folders WHERE folder = ?", (subfolder,))
+            if mtime is not None and time.time_ns() - mtime > SETTLE_NS:
+                connection.execute("INSERT INTO folders VALUES (?, ?)", (subfolder, mtime))
+    except sqlite3.Error:
+        pass  # e.g. a read-only dataset, the next run just reads the changed files again
+    return entries, len(stale)
+
+def load_index(folder, hashes=False, threads=READ_THREADS, create=False, quick=True):
+    """Return (DatasetIndex, {"images": {name: FileEntry}, "labels": {...}}, files re-read) for a dataset folder.
+
+    With hashes, every file also gets a content hash (xxhash if installed).
+    create writes the cache file into the folder if it has none; quick is passed on to refresh.
+    """
+    connection = open_cache(folder, create)
+    try:
+        entries, changed = {}, 0
+        for subfolder in ("images", "labels"):
+            entries[subfolder], reread = refresh(connection, folder, subfolder, hashes, threads, quick)
+            changed += reread
+    finally:
+        connection.close()
+    index = scan_dataset(folder, {subfolder: list(files) for subfolder, files in entries.items()})
+    return index, entries, changed
+
+def label_cache_folder(folder):
+    """Return (folder holding the cache, subfolder) for a labels folder: a folder named labels uses its dataset's."""
+    folder = os.path.normpath(folder)
+    if os.path.basename(folder) == "labels":
+        return os.path.split(folder)
+    return folder, ""
+
+def load_labels(folder, threads=READ_THREADS, create=False):
+    """Return ({name: FileEntry}, files re-read) for a folder of label files, cached like load_index.
+
+    A folder named labels shares the cache of its dataset folder. Every file is
+    checked (no quick mode), since callers act on the label contents.
+    """
+    folder, subfolder = label_cache_folder(folder)
+    connection = open_cache(folder, create)
+    try:
+        return refresh(connection, folder, subfolder, threads=threads)
+    finally:
+        connection.close()
+
+def label_totals(label_entries):
+    """Return (boxes, {class id: label files containing it}) from cached label entries."""
+    boxes = 0
+    files_per_class = {}
+    for entry in label_entries.values():
+        if entry.boxes is None:
+            continue
+        boxes += entry.boxes
+        for class_id in entry.classes.split():
+            files_per_class[class_id] = files_per_class.get(class_id, 0) + 1
+    return boxes, files_per_class
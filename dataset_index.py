@@ -0,0 +1,110 @@
+"""One-pass index of a YOLO dataset folder (images/ and labels/).
+
+scan_dataset() lists each subfolder with a single os.scandir call and pairs
+images with labels by file stem in memory, so checking for orphaned labels or
+missing labels costs set operations instead of a stat call per file, which
+matters on network filesystems with millions of files.
+"""
+import hashlib
+import os
+import re
+from collections import namedtuple
+
+from dataset_lists import CLASSES_FILE
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff")
+
+# The persistent index (see dataset_cache) and the binary label cache (see label_cache). Files
+# starting with these names, including SQLite side files, are never part of the dataset.
+INDEX_CACHE_NAME = ".dataset_index.sqlite"
+LABEL_CACHE_NAME = ".labels_cache.npz"
+CACHE_FILES = (INDEX_CACHE_NAME, LABEL_CACHE_NAME)
+
+# Frame number suffix the frame extractor appends, e.g. "cam1_frame_120" -> "cam1". Other
+# trailing numbers (img_0001) are part of the name, not a frame number.
+FRAME_SEPARATOR = "_frame_"
+FRAME_SUFFIX = re.compile(FRAME_SEPARATOR + r"\d+$")
+
+# images and labels map a file stem to its file name. extra_images holds the
+# other files in images/ (non-images and images whose stem is already taken),
+# extra_labels the non-.txt files in labels/ and classes.txt, which is no label.
+DatasetIndex = namedtuple("DatasetIndex", ["images_folder", "labels_folder", "images", "labels",
+                                           "extra_images", "extra_labels"])
+
+def split_name(name):
+    """Return (stem, extension) like os.path.splitext for a bare file name, but cheaper."""
+    stem, dot, extension = name.rpartition(".")
+    if not stem.strip("."):
+        return name, ""  # No dot, or a dot file like .DS_Store
+    return stem, dot + extension
+
+def is_image(name):
+    return split_name(name)[1].lower() in IMAGE_EXTENSIONS
+
+def list_files(folder):
+    # One scandir pass; a missing folder is just empty
+    try:
+        with os.scandir(folder) as entries:
+            return [entry.name for entry in entries
+                    if entry.is_file() and not entry.name.startswith(CACHE_FILES)]
+    except FileNotFoundError:
+        return []
+
+def scan_dataset(folder, listings=None):
+    """Index folder/images and folder/labels, with image extensions matched case-insensitively.
+
+    listings can hold the file names of "images" and "labels" when the caller
+    already has them, e.g. from the persistent index, to skip listing them again.
+    """
+    images_folder = os.path.join(folder, "images")
+    labels_folder = os.path.join(folder, "labels")
+    if listings is None:
+        listings = {"images": list_files(images_folder), "labels": list_files(labels_folder)}
+    images, labels, extra_images, extra_labels = {}, {}, [], []
+    for name in sorted(listings["images"]):
+        stem, extension = split_name(name)
+        if extension.lower() in IMAGE_EXTENSIONS and stem not in images:
+            images[stem] = name
+        else:
+            extra_images.append(name)
+    for name in listings["labels"]:
+        stem, extension = split_name(name)
+        if extension.lower() == ".txt" and name != CLASSES_FILE:
+            labels[stem] = name
+        else:
+            extra_labels.append(name)
+    return DatasetIndex(images_folder, labels_folder, images, labels, extra_images, extra_labels)
+
+def orphaned_labels(index):
+    """Return the stems of labels without an image."""
+    return sorted(index.labels.keys() - index.images.keys())
+
+# Plain concatenation instead of os.path.join, these run once per file on large datasets
+def image_path(index, stem):
+    return index.images_folder + os.sep + index.images[stem]
+
+def label_path(index, stem):
+    """Return the label path for stem, or None if the image has no label."""
+    name = index.labels.get(stem)
+    return index.labels_folder + os.sep + name if name is not None else None
+
+def assign_subset(key, train_ratio, valid_ratio):
+    """Return "train", "valid" or "test" for key, from a hash so the answer never changes between runs."""
+    fraction = int(hashlib.md5(key.encode("utf-8")).hexdigest()[:8], 16) / 0x100000000
+    if fraction < train_ratio:
+        return "train"
+    if fraction < train_ratio + valid_ratio:
+        return "valid"
+    return "test"
+
+def frame_stem(base_name, index):
+    """Return the file stem of frame index of the video base_name, as the frame extractor names it."""
+    return f"{base_name}{FRAME_SEPARATOR}{index}"
+
+def video_group(stem):
+    """Return the source video of an extracted frame's stem, so all its frames land in one subset.
+
+    Both the frame extractor's split and the dataset split's "by source video"
+    assignment hash this key, so a video lands in the same subset in both.
+    """
+    return FRAME_SUFFIX.sub("", stem) or stem
@@ -0,0 +1,152 @@
+"""Load all YOLO labels of a dataset into NumPy arrays, and split or count classes with them.
+
+Label files are read on a thread pool and parsed in one vectorized pass over
+their joined contents, instead of splitting every line in Python, which keeps
+a million label files down to seconds. The result has one row per non-empty
+label line: the image it belongs to, its class id, its box and its number of
+columns.
+"""
+import warnings
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from dataset_shards import read_data
+
+READ_THREADS = 16
+SUBSETS = ("train", "valid", "test")
+
+# classes is -1 where the first column is not a whole, non-negative number, boxes
+# (x_center, y_center, width, height) is NaN for lines without exactly 5 columns,
+# e.g. segmentation polygons.
+LabelArrays = namedtuple("LabelArrays", ["image_ids", "classes", "boxes", "columns"])
+
+# ASCII whitespace, as bytes.split() sees it
+WHITESPACE = np.array([9, 10, 11, 12, 13, 32], dtype=np.uint8)
+
+def read_sources(sources, threads=READ_THREADS):
+    """Return the bytes of each source (path or shard member), b"" for None."""
+    def read(source):
+        return read_data(source) if source is not None else b""
+
+    with ThreadPoolExecutor(max_workers=max(threads, 1)) as pool:
+        return list(pool.map(read, sources, chunksize=256))
+
+def parse_tokens(joined, token_count):
+    """Return the float value of every whitespace-separated token of joined bytes, NaN where it is no number.
+
+    Tokens are split on ASCII whitespace only, as parse_labels counts them. NumPy parses the whole text at
+    once; if its value count differs (bad tokens, or Unicode whitespace such as a non-breaking space that
+    it would split on), every token is parsed on its own so the values stay aligned with the token count.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        try:
+            values = np.fromstring(joined.decode("ascii"), dtype=np.float64, sep=" ")
+            if len(values) == token_count:
+                return values
+        except (UnicodeDecodeError, ValueError, DeprecationWarning):
+            pass
+    values = np.empty(token_count, dtype=np.float64)
+    for i, token in enumerate(joined.split()):
+        try:
+            values[i] = float(token)
+        except ValueError:
+            values[i] = np.nan
+    return values
+
+def parse_labels(datas):
+    """Parse a list of label file contents (bytes), one per image, into LabelArrays."""
+    joined = b"\n".join(datas)
+    buffer = np.frombuffer(joined, dtype=np.uint8)
+    space = np.isin(buffer, WHITESPACE)
+    token_start = ~space
+    token_start[1:] &= space[:-1]
+
+    # Line of every token (the newlines before it), then tokens per line and the image of every line
+    line_of_token = np.searchsorted(np.flatnonzero(buffer == 10), np.flatnonzero(token_start))
+    lines_per_file = np.fromiter((data.count(b"\n") + 1 for data in datas), dtype=np.int64, count=len(datas))
+    line_count = int(lines_per_file.sum())
+    columns = np.bincount(line_of_token, minlength=line_count)
+    file_of_line = np.repeat(np.arange(len(datas), dtype=np.int32), lines_per_file)
+
+    values = parse_tokens(joined, len(line_of_token))
+    first_token = np.concatenate(([0], np.cumsum(columns)[:-1]))
+    rows = np.flatnonzero(columns)
+    first_token = first_token[rows]
+    columns = columns[rows]
+
+    class_values = values[first_token]
+    with np.errstate(invalid="ignore"):
+        valid_class = (class_values >= 0) & (class_values == np.floor(class_values)) & (class_values < 2 ** 31)
+    classes = np.where(valid_class, np.nan_to_num(class_values), -1).astype(np.int32)
+
+    boxes = np.full((len(rows), 4), np.nan, dtype=np.float32)
+    is_box = columns == 5
+    boxes[is_box] = values[first_token[is_box, None] + np.arange(1, 5)]
+    return LabelArrays(file_of_line[rows], classes, boxes, columns.astype(np.int16))
+
+def load_labels(sources, threads=READ_THREADS):
+    """Read and parse the labels of a list of images; sources are label paths, shard members or None."""
+    return parse_labels(read_sources(sources, threads))
+
+def class_pairs(labels):
+    """Return the image x class count matrix in sparse form: (image ids, class ids, counts) of non-zero cells."""
+    valid = labels.classes >= 0
+    class_count = int(labels.classes.max()) + 1 if valid.any() else 0
+    cells, counts = np.unique(labels.image_ids[valid].astype(np.int64) * class_count + labels.classes[valid],
+                              return_counts=True)
+    if not class_count:
+        return cells, cells, counts
+    return cells // class_count, cells % class_count, counts
+
+def class_matrix(labels, image_count):
+    """Return the dense image x class count matrix, for datasets small enough to hold it."""
+    images, classes, counts = class_pairs(labels)
+    matrix = np.zeros((image_count, int(classes.max()) + 1 if len(classes) else 0), dtype=np.int32)
+    matrix[images, classes] = counts
+    return matrix
+
+def stratified_split(labels, image_count, train_ratio, valid_ratio, seed=None):
+    """Return the subset (0 train, 1 valid, 2 test) of every image, keeping each class near the ratios.
+
+    Every image is grouped by the rarest class it contains, counted in boxes
+    over the whole dataset, and each group is shuffled and cut by the ratios
+    on its own. Rare classes therefore get their share of valid and test
+    images instead of depending on luck; images without labels form one more
+    group.
+    """
+    images, classes, counts = class_pairs(labels)
+    class_totals = np.bincount(classes, weights=counts)
+    # Rarest class per image: sort the image's classes by total, keep the first
+    order = np.lexsort((classes, class_totals[classes], images))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = images[order][1:] != images[order][:-1]
+    group = np.full(image_count, len(class_totals), dtype=np.int64)  # Background group
+    group[images[order][first]] = classes[order][first]
+
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(image_count), group))
+    group_sizes = np.bincount(group, minlength=len(class_totals) + 1)
+    group_starts = np.concatenate(([0], np.cumsum(group_sizes)[:-1]))
+    rank = np.arange(image_count) - group_starts[group[order]]
+    size = group_sizes[group[order]]
+    subsets = np.empty(image_count, dtype=np.int8)
+    subsets[order] = np.where(rank < np.round(size * train_ratio), 0,
+                              np.where(rank < np.round(size * (train_ratio + valid_ratio)), 1, 2))
+    return subsets
+
+def class_histograms(labels, subsets):
+    """Return {subset name: {class id: boxes}} for subsets, the subset number of every image."""
+    valid = labels.classes >= 0
+    box_subsets = subsets[labels.image_ids[valid]]
+    histograms = {}
+    for number, name in enumerate(SUBSETS):
+        counts = np.bincount(labels.classes[valid][box_subsets == number])
+        histograms[name] = {class_id: int(count) for class_id, count in enumerate(counts) if count}
+    return histograms
+
+def format_histogram(histogram):
+    """Describe a class histogram, e.g. "0: 1200, 1: 35, 7: 2"."""
+    return ", ".join(f"{class_id}: {count}" for class_id, count in sorted(histogram.items())) or "no boxes"
@@ -0,0 +1,56 @@
+"""YOLO list-file splits: train.txt/val.txt/test.txt plus data.yaml, without copying any image.
+
+Ultralytics YOLO accepts a text file of image paths wherever it accepts an
+image folder, and finds each label by swapping /images/ for /labels/ in the
+path, so a split can point straight at the original images/labels tree.
+"""
+import json
+import os
+
+# Subset folder names as used by split_dataset -> list file names YOLO expects
+LIST_FILES = {"train": "train.txt", "valid": "val.txt", "test": "test.txt"}
+DATA_YAML = "data.yaml"
+CLASSES_FILE = "classes.txt"
+
+def load_class_names(dataset_folder):
+    """Return the class names from dataset_folder/classes.txt (one per line, as labelImg writes it), or None."""
+    for path in (os.path.join(dataset_folder, CLASSES_FILE), os.path.join(dataset_folder, "labels", CLASSES_FILE)):
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                return [line.strip() for line in f if line.strip()]
+    return None
+
+def write_text(path, text):
+    # Write next to the target and rename, so a crash never leaves half a list behind
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+def write_split_lists(output_folder, subsets, dataset_folder, names=None):
+    """Write one list file per subset and a data.yaml pointing at them, and return the data.yaml path.
+
+    subsets maps "train"/"valid"/"test" to image paths inside dataset_folder.
+    Paths are written absolute so the lists work from any working directory.
+    """
+    absolute_folder = os.path.abspath(dataset_folder)
+    os.makedirs(output_folder, exist_ok=True)
+    lines = ["# Written by the dataset split tool, images and labels stay in the original folder",
+             f"path: {json.dumps(absolute_folder)}"]
+    for subset, list_name in LIST_FILES.items():
+        list_path = os.path.abspath(os.path.join(output_folder, list_name))
+        paths = subsets.get(subset, [])
+        if not os.path.isabs(dataset_folder):
+            paths = [os.path.abspath(path) for path in paths]
+        write_text(list_path, "".join(path + "\n" for path in paths))
+        lines.append(f"{list_name[:-4]}: {json.dumps(list_path)}")
+    if names:
+        lines.append(f"nc: {len(names)}")
+        lines.append("names:")
+        lines.extend(f"  {class_id}: {json.dumps(name)}" for class_id, name in enumerate(names))
+    else:
+        lines.append("# No classes.txt found next to images/ and labels/, add the class names before training:")
+        lines.append("names: {}")
+    yaml_path = os.path.join(output_folder, DATA_YAML)
+    write_text(yaml_path, "\n".join(lines) + "\n")
+    return yaml_path
@@ -0,0 +1,98 @@
+"""Duplicate-free merging of several datasets into one images/labels folder.
+
+plan_merge() walks the datasets in order. With skip_duplicates it keeps the
+first copy of every image, judged by a hash of its contents, so the same
+frame delivered twice under different names is merged once. A file whose
+output name is already taken in its folder (for images, the stem, since
+labels pair with images by stem) is always renamed to <stem>_<first hash
+digits>, with its image or label renamed to match, so the new name only
+depends on the file itself and no two datasets write the same output file.
+Files that only share a stem with another folder's file keep their names.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from dataset_cache import hash_data, hash_file
+from dataset_index import is_image, split_name
+from dataset_shards import read_member
+
+REPORT_NAME = "merge_report.json"
+
+def output_names(sample, stem):
+    # (subset, file name) of every file of a sample written under stem. Images pair with labels by stem,
+    # so a.jpg and a.png clash and an image is known by its stem alone.
+    return [(subset, stem if subset == "images" and is_image(name) else stem + split_name(name)[1])
+            for subset, name, _ in sample]
+
+def rename(stem, digest, taken, sample):
+    # Deterministic: the same file always gets the same new name, a counter only breaks hash prefix ties
+    new_stem = f"{stem}_{digest.split(':')[-1][:8]}"
+    counter = 2
+    while any(name in taken for name in output_names(sample, new_stem)):
+        new_stem = f"{stem}_{digest.split(':')[-1][:8]}_{counter}"
+        counter += 1
+    return new_stem
+
+def source_digest(source):
+    """Return the content hash of a file path or shard member."""
+    return hash_file(source) if isinstance(source, str) else hash_data(read_member(source))
+
+def member_digests(members, threads=8):
+    """Return {member: content hash} for shard members, read on a thread pool."""
+    with ThreadPoolExecutor(max_workers=max(threads, 1)) as pool:
+        return dict(zip(members, pool.map(source_digest, members)))
+
+def plan_merge(datasets, skip_duplicates=True):
+    """Return (samples, report) for merging datasets, a list of (dataset name, samples, digests).
+
+    Samples are lists of (subset, file name, source) as folder_samples returns
+    them, an image first with its label, and digests maps each source to its
+    content hash. Without skip_duplicates digests may be None; only files
+    that need a new name are hashed then. The returned samples carry the
+    output file names. The report lists the skipped duplicates, the renamed
+    files and the duplicates whose labels differ from the kept copy's.
+    """
+    kept = {}      # image hash -> (where, label hash)
+    taken = {}     # (subset, output file name) -> source of the file that took it
+    merged = []
+    report = {"duplicates": [], "renamed": [], "label_conflicts": []}
+    for dataset, samples, digests in datasets:
+        for sample in samples:
+            subset, name, source = sample[0]
+            where = f"{dataset}/{subset}/{name}"
+            if skip_duplicates and subset == "images" and is_image(name):
+                digest = digests[source]
+                label_digest = next((digests[label_source] for label_subset, _, label_source in sample[1:]
+                                     if label_subset == "labels"), None)
+                if digest in kept:
+                    kept_where, kept_label = kept[digest]
+                    report["duplicates"].append({"skipped": where, "kept": kept_where})
+                    if label_digest != kept_label:
+                        report["label_conflicts"].append({"skipped": where, "kept": kept_where})
+                    continue
+                kept[digest] = (where, label_digest)
+
+            stem = split_name(name)[0]
+            clashes = [taken[output] for output in output_names(sample, stem) if output in taken]
+            if clashes:
+                digest = digests[source] if digests is not None else source_digest(source)
+                owner = clashes[0]
+                if len(sample) == 1 and digest == (digests[owner] if digests is not None and owner in digests
+                                                   else source_digest(owner)):
+                    continue  # The same file again, e.g. classes.txt in every dataset
+                stem = rename(stem, digest, taken, sample)
+                report["renamed"].append({"source": where, "renamed_to": stem + split_name(name)[1]})
+            for output, (_, _, item_source) in zip(output_names(sample, stem), sample):
+                taken[output] = item_source
+            merged.append([(item_subset, stem + split_name(item)[1], item_source)
+                           for item_subset, item, item_source in sample])
+    return merged, report
+
+def write_report(merged_folder, report):
+    """Write the merge report as JSON next to the merged data and return its path."""
+    os.makedirs(merged_folder, exist_ok=True)
+    report_path = os.path.join(merged_folder, REPORT_NAME)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report_path
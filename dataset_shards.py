@@ -0,0 +1,121 @@
+"""Sequential tar shards (WebDataset layout) for extracted frames and image+label datasets.
+
+A shard folder holds {prefix}-000000.tar, {prefix}-000001.tar, ... and one
+{prefix}.index.json per prefix that records where every member's data starts,
+so members can be read back with a single seek instead of unpacking. Members of
+one sample (e.g. frame_12.jpg and frame_12.txt) are always written next to each
+other in the same shard, which is what WebDataset loaders expect.
+"""
+import io
+import json
+import os
+import tarfile
+import time
+
+from dataset_index import is_image
+
+INDEX_SUFFIX = ".index.json"
+DEFAULT_SHARD_MB = 512
+
+def shard_writer(output_folder, prefix="shard", max_bytes=DEFAULT_SHARD_MB * 1024 * 1024):
+    """Return (write, close) for a new shard set in output_folder.
+
+    write(members) appends a sample, a list of (name, bytes), starting a new
+    shard first if it would push the current one past max_bytes. close()
+    finishes the last shard and writes the index.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    shards = []
+    members = []
+    state = {"tar": None, "file": None}
+
+    def start_shard():
+        finish_shard()
+        name = f"{prefix}-{len(shards):06d}.tar"
+        shards.append(name)
+        state["file"] = open(os.path.join(output_folder, name), "wb")
+        state["tar"] = tarfile.open(fileobj=state["file"], mode="w", format=tarfile.PAX_FORMAT)
+
+    def finish_shard():
+        if state["tar"] is not None:
+            state["tar"].close()
+            state["file"].close()
+            state["tar"] = state["file"] = None
+
+    def write(sample):
+        size = sum(len(data) for _, data in sample)
+        tar = state["tar"]
+        if tar is None or (tar.offset > 0 and tar.offset + size > max_bytes):
+            start_shard()
+            tar = state["tar"]
+        now = time.time()
+        for name, data in sample:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = now
+            header_size = len(info.tobuf(tar.format, tar.encoding, tar.errors))
+            members.append([len(shards) - 1, name, tar.offset + header_size, len(data)])
+            tar.addfile(info, io.BytesIO(data))
+
+    def close():
+        finish_shard()
+        with open(os.path.join(output_folder, prefix + INDEX_SUFFIX), "w") as f:
+            json.dump({"version": 1, "shards": shards, "members": members}, f)
+
+    return write, close
+
+def is_shard_folder(folder_path):
+    return os.path.isdir(folder_path) and any(name.endswith(INDEX_SUFFIX) for name in os.listdir(folder_path))
+
+def load_shard_index(folder_path):
+    """Return [(shard_path, name, offset, size), ...] for every member of every shard set in folder_path."""
+    members = []
+    for index_name in sorted(os.listdir(folder_path)):
+        if not index_name.endswith(INDEX_SUFFIX):
+            continue
+        with open(os.path.join(folder_path, index_name)) as f:
+            index = json.load(f)
+        shard_paths = [os.path.join(folder_path, name) for name in index["shards"]]
+        members.extend((shard_paths[shard], name, offset, size) for shard, name, offset, size in index["members"])
+    return members
+
+def read_shard_dataset(folder_path):
+    """Return (images, labels), each {stem: (shard_path, name, offset, size)}, of a shard folder."""
+    images, labels = {}, {}
+    for member in load_shard_index(folder_path):
+        stem, extension = os.path.splitext(member[1])
+        if extension.lower() == ".txt":
+            labels[stem] = member
+        elif is_image(member[1]):
+            images[stem] = member
+    return images, labels
+
+def read_member(member):
+    shard_path, _, offset, size = member
+    with open(shard_path, "rb") as f:
+        f.seek(offset)
+        return f.read(size)
+
+def read_data(source):
+    """Return the bytes of a file path or a shard member."""
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read()
+    return read_member(source)
+
+def location_key(source):
+    """Sort key that puts shard members in file order, so reading them is one sequential pass per shard."""
+    if isinstance(source, str):
+        return source, 0
+    return source[0], source[2]
+
+def group_samples(members):
+    """Group consecutive shard members that share a stem into samples, as shard_writer wrote them."""
+    samples = []
+    for member in members:
+        stem = os.path.splitext(member[1])[0]
+        if samples and os.path.splitext(samples[-1][-1][1])[0] == stem:
+            samples[-1].append(member)
+        else:
+            samples.append([member])
+    return samples
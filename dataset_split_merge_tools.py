@@ -1,9 +1,10 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import os
-import shutil
 from datetime import datetime
 import random
+from dataset_index import image_path, label_path, orphaned_labels, scan_dataset
+from dataset_transfer import format_rate, transfer_files
 
 def split_dataset():
     try:
@@ -25,24 +26,19 @@ def split_dataset():
             messagebox.showerror("Error", "Invalid train/valid/test ratio.")
             return
 
-        images_folder = os.path.join(source_folder, "images")
-        labels_folder = os.path.join(source_folder, "labels")
-
-        if not os.path.exists(images_folder) or not os.path.exists(labels_folder):
+        if not os.path.isdir(os.path.join(source_folder, "images")) or \
+                not os.path.isdir(os.path.join(source_folder, "labels")):
             messagebox.showerror("Error", "Source folder must contain 'images' and 'labels'.")
             return
 
-        all_images = os.listdir(images_folder)
+        index = scan_dataset(source_folder)
+        all_images = list(index.images)
         random.shuffle(all_images)
 
-        # Check for missing images or labels
-        for label_file in os.listdir(labels_folder):
-            image_name = os.path.splitext(label_file)[0] + ".jpg"  # Assuming .jpg images
-            image_path = os.path.join(images_folder, image_name)
-            label_path = os.path.join(labels_folder, label_file)
-            if not os.path.exists(image_path):
-                os.remove(label_path)
-                print(f"Removed missing label file: {label_file}")
+        # Remove labels whose image is missing (any image extension counts)
+        for stem in orphaned_labels(index):
+            os.remove(label_path(index, stem))
+            print(f"Removed missing label file: {index.labels[stem]}")
 
         train_count = int(len(all_images) * train_ratio)
         valid_count = int(len(all_images) * valid_ratio)
@@ -53,21 +49,22 @@ def split_dataset():
             "test": all_images[train_count + valid_count:]
         }
 
+        jobs = []
         for subset, images in subsets.items():
             subset_images_folder = os.path.join(output_folder, subset, "images")
             subset_labels_folder = os.path.join(output_folder, subset, "labels")
             os.makedirs(subset_images_folder, exist_ok=True)
             os.makedirs(subset_labels_folder, exist_ok=True)
 
-            for image in images:
-                image_path = os.path.join(images_folder, image)
-                label_path = os.path.join(labels_folder, os.path.splitext(image)[0] + ".txt")
-                shutil.copy(image_path, subset_images_folder)
+            for stem in images:
+                image = index.images[stem]
+                jobs.append((image_path(index, stem), os.path.join(subset_images_folder, image)))
                 # Copy label file only if it exists
-                if os.path.exists(label_path):
-                    shutil.copy(label_path, subset_labels_folder)
+                if stem in index.labels:
+                    jobs.append((label_path(index, stem), os.path.join(subset_labels_folder, index.labels[stem])))
 
-        messagebox.showinfo("Success", "Dataset split completed.")
+        stats = transfer_files(jobs)
+        messagebox.showinfo("Success", f"Dataset split completed.\n{format_rate(stats)}")
     except Exception as e:
         messagebox.showerror("Error", str(e))
         
@@ -95,15 +92,17 @@ def merge_dataset():
         os.makedirs(images_output, exist_ok=True)
         os.makedirs(labels_output, exist_ok=True)
 
+        jobs = []
         for folder in folders:
             for subset in ["images", "labels"]:
                 subset_folder = os.path.join(folder, subset)
                 for item in os.listdir(subset_folder):
                     source_path = os.path.join(subset_folder, item)
                     target_path = os.path.join(images_output if subset == "images" else labels_output, item)
-                    shutil.copy(source_path, target_path)
+                    jobs.append((source_path, target_path))
 
-        messagebox.showinfo("Success", f"Merged dataset created at: {merged_folder}")
+        stats = transfer_files(jobs)
+        messagebox.showinfo("Success", f"Merged dataset created at: {merged_folder}\n{format_rate(stats)}")
     except Exception as e:
         messagebox.showerror("Error", str(e))
 
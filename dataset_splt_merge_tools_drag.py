@@ -1,10 +1,21 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, scrolledtext
 import os
-import shutil
 from datetime import datetime
 import random
+import numpy as np
 from tkinterdnd2 import TkinterDnD, DND_FILES
+from dataset_shards import (DEFAULT_SHARD_MB, group_samples, is_shard_folder, load_shard_index, location_key,
+                            read_data, read_shard_dataset, shard_writer)
+from dataset_cache import label_totals, load_index
+from dataset_labels import SUBSETS, class_histograms, format_histogram, load_labels, stratified_split
+from label_cache import cached_labels
+from dataset_merge import member_digests, plan_merge, write_report
+from dataset_stats import collect_stats, format_summary, stats_report, write_stats
+from dataset_lists import LIST_FILES, load_class_names, write_split_lists
+from dataset_index import (INDEX_CACHE_NAME, assign_subset, image_path, list_files, label_path, orphaned_labels,
+                           split_name, video_group)
+from dataset_transfer import DEFAULT_TRANSFER_THREADS, LINK_MODES, describe_modes, format_rate, transfer_files
 
 def update_status(message):
     status_text.insert(tk.END, message + "\n")
@@ -31,6 +42,151 @@ def select_folder(label):
         label.config(text=folder_path)
         update_status(f"📂 Selected folder: {folder_path}")
 
+def read_shard_mb():
+    # 0 means loose files, None an invalid size (already reported)
+    if not shard_var.get():
+        return 0
+    try:
+        shard_mb = float(shard_size_entry.get())
+    except ValueError:
+        shard_mb = 0
+    if shard_mb <= 0:
+        messagebox.showerror("Error", "Shard size must be a positive number of MB.")
+        return None
+    return shard_mb
+
+def read_transfer_threads():
+    try:
+        threads = int(transfer_threads_entry.get())
+    except ValueError:
+        threads = 0
+    if threads <= 0:
+        messagebox.showerror("Error", "Transfer threads must be a positive integer.")
+        return None
+    return threads
+
+def show_progress(done, total):
+    progress = (done / total) * 100 if total else 100
+    progress_bar['value'] = progress
+    progress_label.config(text=f"{progress:.1f}%")
+    root.update_idletasks()
+
+# Split assignment menu entries -> how the subset of an image stem is chosen (None shuffles,
+# "stratified" balances every class over the subsets)
+SPLIT_ASSIGNMENTS = {
+    "Random shuffle": None,
+    "Stable (hash of file name)": lambda stem: stem,
+    "Stable, by source video": video_group,
+    "Stratified by class": "stratified",
+}
+
+def output_mode(shard_mb, transfer_mode, stats):
+    if shard_mb:
+        return f"tar shards of {shard_mb:g} MB"
+    return describe_modes(transfer_mode, stats["modes"]) if stats else transfer_mode
+
+def folder_samples(folder, name, digests=None):
+    """Return the (subset, file name, path) entries of an images/labels folder, each image grouped with its label.
+
+    If digests is a dict, it is filled with {path: content hash} of every file, from the index cache.
+    """
+    index, entries, _ = load_index(folder, hashes=digests is not None, create=index_cache_var.get())
+    for subset_folder in (index.images_folder, index.labels_folder):
+        if not os.path.isdir(subset_folder):
+            update_status(f"⚠️ Missing {os.path.basename(subset_folder)} folder in {name}")
+    samples = []
+    for stem, image in index.images.items():
+        sample = [("images", image, image_path(index, stem))]
+        if stem in index.labels:
+            sample.append(("labels", index.labels[stem], label_path(index, stem)))
+        samples.append(sample)
+    # Everything else is merged too, as before: orphaned labels and non-image files
+    samples.extend([("labels", index.labels[stem], label_path(index, stem))] for stem in orphaned_labels(index))
+    samples.extend([("images", item, os.path.join(index.images_folder, item))] for item in index.extra_images)
+    samples.extend([("labels", item, os.path.join(index.labels_folder, item))] for item in index.extra_labels)
+    if digests is not None:
+        digests.update((path, entries[subset][item].hash) for sample in samples for subset, item, path in sample)
+    return samples
+
+def remove_moved_files(output_folder, subsets):
+    """Delete files of an earlier split that are now assigned to another subset, and return how many."""
+    removed = 0
+    for subset in subsets:
+        others = {os.path.splitext(image)[0] for other, images in subsets.items() if other != subset
+                  for image, _, _ in images}
+        for folder in ("images", "labels"):
+            subset_folder = os.path.join(output_folder, subset, folder)
+            for name in list_files(subset_folder):
+                if os.path.splitext(name)[0] in others:
+                    os.remove(os.path.join(subset_folder, name))
+                    removed += 1
+    return removed
+
+def read_labels(source_folder, items):
+    """Return LabelArrays for (name, source, label source) items, loose labels through the label cache."""
+    label_sources = [label_source for _, _, label_source in items]
+    if is_shard_folder(source_folder):
+        return load_labels(label_sources)
+    labels, parsed = cached_labels(os.path.join(source_folder, "labels"),
+                                   [os.path.basename(source) if source is not None else None
+                                    for source in label_sources])
+    update_status(f"🏷️ Label cache: {parsed} new or changed label files parsed")
+    return labels
+
+def write_split_stats(output_folder, subsets, threads):
+    """Collect the statistics of every subset and write them next to the split."""
+    reports = {}
+    for subset in SUBSETS:
+        items = [(image_source, label_source) for _, image_source, label_source in subsets[subset]]
+        update_status(f"📊 Collecting {subset} statistics ({len(items)} images)...")
+        reports[subset] = stats_report(collect_stats(items, threads, show_progress))
+        update_status(f"    {format_summary(reports[subset])}")
+    for path in write_stats(output_folder, reports):
+        update_status(f"📊 Statistics: {path}")
+
+def merged_histogram(samples):
+    """Return {class id: boxes} over the labels of merged samples, loose labels through the label cache."""
+    members = []
+    names_by_folder = {}
+    for sample in samples:
+        for subset, _, source in sample:
+            if subset != "labels" or not source_name(source).lower().endswith(".txt"):
+                continue
+            if isinstance(source, str):
+                folder, name = os.path.split(source)
+                names_by_folder.setdefault(folder, []).append(name)
+            else:
+                members.append(source)
+    parts = [cached_labels(folder, names)[0] for folder, names in names_by_folder.items()]
+    if members:
+        parts.append(load_labels(members))
+    counts = np.zeros(0, dtype=np.int64)
+    for labels in parts:
+        part = np.bincount(labels.classes[labels.classes >= 0])
+        counts = np.pad(counts, (0, max(len(part) - len(counts), 0)))
+        counts[:len(part)] += part
+    return {class_id: int(count) for class_id, count in enumerate(counts) if count}
+
+def source_name(source):
+    return os.path.basename(source) if isinstance(source, str) else source[1]
+
+def split_jobs(output_folder, subsets):
+    """Yield the (source, target) transfers of a split, one image at a time."""
+    for subset, images in subsets.items():
+        for image, image_source, label_source in images:
+            yield image_source, os.path.join(output_folder, subset, "images", image)
+            # Copy the label only if it exists
+            if label_source is not None:
+                yield label_source, os.path.join(output_folder, subset, "labels", os.path.splitext(image)[0] + ".txt")
+
+def add_datasets(folders):
+    for folder in folders:
+        if os.path.isfile(folder):
+            folder = os.path.dirname(folder)
+        if folder and folder not in extra_datasets.get(0, tk.END):
+            extra_datasets.insert(tk.END, folder)
+            update_status(f"📂 Added dataset: {folder}")
+
 def split_dataset():
     try:
         source_folder = source_label.cget("text")
@@ -51,11 +207,24 @@ def split_dataset():
             messagebox.showerror("Error", "Invalid train/valid/test ratio.")
             return
 
-        images_folder = os.path.join(source_folder, "images")
-        labels_folder = os.path.join(source_folder, "labels")
+        shard_mb = read_shard_mb()
+        transfer_mode = transfer_var.get()
+        transfer_threads = read_transfer_threads()
+        if shard_mb is None or transfer_threads is None:
+            return
+        list_only = list_split_var.get()
+        assignment_key = SPLIT_ASSIGNMENTS[split_assignment_var.get()]
 
-        if not os.path.exists(images_folder) or not os.path.exists(labels_folder):
-            messagebox.showerror("Error", "Source folder must contain 'images' and 'labels'.")
+        shard_source = is_shard_folder(source_folder)
+        if shard_source and list_only:
+            messagebox.showerror("Error", "List files need an 'images'/'labels' source folder, not tar shards.")
+            return
+        if shard_source:
+            image_sources, label_sources = read_shard_dataset(source_folder)
+            all_images = [(member[1], member, label_sources.get(stem)) for stem, member in image_sources.items()]
+        elif not os.path.isdir(os.path.join(source_folder, "images")) or \
+                not os.path.isdir(os.path.join(source_folder, "labels")):
+            messagebox.showerror("Error", "Source folder must contain 'images' and 'labels', or tar shards.")
             return
 
         # Clear status and start new processing
@@ -63,71 +232,131 @@ def split_dataset():
         update_status(f"🚀 Starting dataset split...")
         update_status(f"📊 Split ratios - Train: {train_ratio:.1%}, Valid: {valid_ratio:.1%}, Test: {test_ratio:.1%}")
 
-        all_images = os.listdir(images_folder)
-        update_status(f"📄 Found {len(all_images)} images")
-        
-        random.shuffle(all_images)
-
-        # Check for missing images or labels
-        missing_count = 0
-        for label_file in os.listdir(labels_folder):
-            base_name = os.path.splitext(label_file)[0]
-            # Check for both .jpg and .png extensions
-            image_path_jpg = os.path.join(images_folder, base_name + ".jpg")
-            image_path_png = os.path.join(images_folder, base_name + ".png")
-            label_path = os.path.join(labels_folder, label_file)
-            
-            # Only remove if neither jpg nor png exists
-            if not os.path.exists(image_path_jpg) and not os.path.exists(image_path_png):
-                os.remove(label_path)
+        if shard_source:
+            update_status(f"📦 Reading tar shards from {source_folder}")
+        else:
+            index, entries, changed = load_index(source_folder, create=index_cache_var.get())
+            if os.path.exists(os.path.join(source_folder, INDEX_CACHE_NAME)):
+                update_status(f"🗂️ Index: {changed} new or changed files read, the rest from {INDEX_CACHE_NAME}")
+            all_images = [(name, image_path(index, stem), label_path(index, stem))
+                          for stem, name in index.images.items()]
+            for name in index.extra_images:
+                update_status(f"⚠️ Skipped {name}: not an image, or another image has the same name")
+
+            # Remove labels whose image is missing (any image extension counts)
+            missing_count = 0
+            for stem in orphaned_labels(index):
+                os.remove(label_path(index, stem))
                 missing_count += 1
-                update_status(f"⚠️ Removed orphaned label file: {label_file}")
+                update_status(f"⚠️ Removed orphaned label file: {index.labels[stem]}")
+            boxes, files_per_class = label_totals({name: entry for name, entry in entries["labels"].items()
+                                                   if split_name(name)[0] in index.images})
+            class_ids = " ".join(sorted(files_per_class, key=lambda c: (len(c), c)))
+            update_status(f"🏷️ {boxes} boxes in {len(files_per_class)} classes ({class_ids or 'none'})")
 
-        train_count = int(len(all_images) * train_ratio)
-        valid_count = int(len(all_images) * valid_ratio)
+        update_status(f"📄 Found {len(all_images)} images")
 
-        subsets = {
-            "train": all_images[:train_count],
-            "valid": all_images[train_count:train_count + valid_count],
-            "test": all_images[train_count + valid_count:]
-        }
+        if assignment_key is None:
+            random.shuffle(all_images)
+
+            train_count = int(len(all_images) * train_ratio)
+            valid_count = int(len(all_images) * valid_ratio)
+
+            subsets = {
+                "train": all_images[:train_count],
+                "valid": all_images[train_count:train_count + valid_count],
+                "test": all_images[train_count + valid_count:]
+            }
+        elif assignment_key == "stratified":
+            labels = read_labels(source_folder, all_images)
+            subset_ids = stratified_split(labels, len(all_images), train_ratio, valid_ratio, random.getrandbits(32))
+            subsets = {name: [all_images[i] for i in np.flatnonzero(subset_ids == number)]
+                       for number, name in enumerate(SUBSETS)}
+        else:
+            # Each image keeps its subset across runs, so new images never move the old ones
+            subsets = {"train": [], "valid": [], "test": []}
+            for item in all_images:
+                stem = os.path.splitext(item[0])[0]
+                subsets[assign_subset(assignment_key(stem), train_ratio, valid_ratio)].append(item)
+
+        # Boxes per class in every subset, all labels parsed in one pass
+        if assignment_key != "stratified":
+            labels = read_labels(source_folder, [item for name in SUBSETS for item in subsets[name]])
+            subset_ids = np.repeat(np.arange(len(SUBSETS)), [len(subsets[name]) for name in SUBSETS])
+        histograms = class_histograms(labels, subset_ids)
+
+        if list_only:
+            # Nothing is copied, the list files point at the source images
+            names = load_class_names(source_folder)
+            yaml_path = write_split_lists(output_folder, {subset: [image_source for _, image_source, _ in images]
+                                                          for subset, images in subsets.items()},
+                                          source_folder, names)
+            update_status("\n📊 Split Summary:")
+            for subset, list_name in LIST_FILES.items():
+                update_status(f"{subset.capitalize()} set: {len(subsets[subset])} images -> {list_name}")
+                update_status(f"    Classes: {format_histogram(histograms[subset])}")
+            update_status(f"Output: list files, train with {yaml_path}")
+            if names is None:
+                update_status("⚠️ No classes.txt in the source folder, add the class names to data.yaml")
+            if stats_report_var.get():
+                write_split_stats(output_folder, subsets, transfer_threads)
+            update_status("\n✨ Dataset split completed successfully!")
+            return
 
-        total_files = len(all_images) * 2  # Images and labels
+        total_files = sum(2 if label_source is not None else 1 for _, _, label_source in all_images)
         processed_files = 0
+        stats = None
+        # A stable split updates an existing output in place: only new or changed files are transferred
+        update = callable(assignment_key) and not shard_mb
+        if update:
+            moved = remove_moved_files(output_folder, subsets)
+            if moved:
+                update_status(f"♻️ Removed {moved} files that now belong to another subset (the ratios changed)")
 
         for subset, images in subsets.items():
-            subset_images_folder = os.path.join(output_folder, subset, "images")
-            subset_labels_folder = os.path.join(output_folder, subset, "labels")
-            os.makedirs(subset_images_folder, exist_ok=True)
-            os.makedirs(subset_labels_folder, exist_ok=True)
-
             update_status(f"\n📁 Processing {subset} set ({len(images)} images)...")
-
-            for image in images:
-                image_path = os.path.join(images_folder, image)
-                base_name = os.path.splitext(image)[0]
-                label_path = os.path.join(labels_folder, base_name + ".txt")
-                
-                shutil.copy(image_path, subset_images_folder)
-                processed_files += 1
-                
-                if os.path.exists(label_path):
-                    shutil.copy(label_path, subset_labels_folder)
-                    processed_files += 1
-                else:
+            if shard_mb:
+                write_shard, close_shards = shard_writer(os.path.join(output_folder, subset), "shard",
+                                                         int(shard_mb * 1024 * 1024))
+                images = sorted(images, key=lambda item: location_key(item[1]))
+            else:
+                subset_images_folder = os.path.join(output_folder, subset, "images")
+                subset_labels_folder = os.path.join(output_folder, subset, "labels")
+                os.makedirs(subset_images_folder, exist_ok=True)
+                os.makedirs(subset_labels_folder, exist_ok=True)
+
+            for image, image_source, label_source in images:
+                label_name = os.path.splitext(image)[0] + ".txt"
+                if label_source is None:
                     update_status(f"⚠️ Missing label for {image}")
-
-                # Update progress
-                progress = (processed_files / total_files) * 100
-                progress_bar['value'] = progress
-                progress_label.config(text=f"{progress:.1f}%")
-                root.update_idletasks()
+                if shard_mb:
+                    sample = [(image, read_data(image_source))]
+                    if label_source is not None:
+                        sample.append((label_name, read_data(label_source)))
+                    write_shard(sample)
+                    processed_files += len(sample)
+                    show_progress(processed_files, total_files)
+
+            if shard_mb:
+                close_shards()
+
+        if not shard_mb and total_files:
+            update_status(f"\n🚚 Transferring {total_files} files ({transfer_mode}, {transfer_threads} threads)...")
+            stats = transfer_files(split_jobs(output_folder, subsets), transfer_mode, transfer_threads,
+                                   progress=lambda files, _: show_progress(files, total_files), update=update)
 
         # Final summary
         update_status("\n📊 Split Summary:")
-        update_status(f"Train set: {len(subsets['train'])} images")
-        update_status(f"Valid set: {len(subsets['valid'])} images")
-        update_status(f"Test set: {len(subsets['test'])} images")
+        for subset in SUBSETS:
+            update_status(f"{subset.capitalize()} set: {len(subsets[subset])} images")
+            update_status(f"    Classes: {format_histogram(histograms[subset])}")
+        update_status(f"Output: {output_mode(shard_mb, transfer_mode, stats)}")
+        if stats:
+            if stats["modes"]["current"]:
+                update_status(f"Unchanged: {stats['modes']['current']} files were already in place")
+            update_status(f"📈 {format_rate(stats)}")
+        if stats_report_var.get():
+            write_split_stats(output_folder, subsets, transfer_threads)
         update_status("\n✨ Dataset split completed successfully!")
 
     except Exception as e:
@@ -140,9 +369,13 @@ def merge_dataset():
         test_folder = test_label.cget("text")
         merged_output = merged_output_label.cget("text")
 
-        if any(folder == "Drag folder here or click Select" for folder in 
-              [train_folder, valid_folder, test_folder, merged_output]):
-            messagebox.showerror("Error", "Please select all required folders.")
+        # Any of train/valid/test can be left empty when more datasets are listed
+        datasets = [(folder, name) for folder, name in [(train_folder, "train"), (valid_folder, "valid"),
+                                                        (test_folder, "test")]
+                    if folder != "Drag folder here or click Select"]
+        datasets += [(folder, os.path.basename(os.path.normpath(folder))) for folder in extra_datasets.get(0, tk.END)]
+        if not datasets or merged_output == "Drag folder here or click Select":
+            messagebox.showerror("Error", "Please select an output folder and at least one dataset.")
             return
 
         # Clear status and start new processing
@@ -154,46 +387,85 @@ def merge_dataset():
         merged_folder = os.path.join(merged_output, merged_folder_name)
         images_output = os.path.join(merged_folder, "images")
         labels_output = os.path.join(merged_folder, "labels")
-        os.makedirs(images_output, exist_ok=True)
-        os.makedirs(labels_output, exist_ok=True)
+        shard_mb = read_shard_mb()
+        transfer_mode = transfer_var.get()
+        transfer_threads = read_transfer_threads()
+        if shard_mb is None or transfer_threads is None:
+            return
+        dedup = dedup_var.get()
+        if shard_mb:
+            write_shard, close_shards = shard_writer(merged_folder, "shard", int(shard_mb * 1024 * 1024))
+        else:
+            os.makedirs(images_output, exist_ok=True)
+            os.makedirs(labels_output, exist_ok=True)
 
         total_files = 0
         processed_files = 0
+        transfer_jobs = []
+        stats = None
 
         # Count total files first
-        for folder in [train_folder, valid_folder, test_folder]:
+        for folder, _ in datasets:
+            if is_shard_folder(folder):
+                total_files += len(load_shard_index(folder))
+                continue
             for subset in ["images", "labels"]:
-                subset_folder = os.path.join(folder, subset)
-                if os.path.exists(subset_folder):
-                    total_files += len(os.listdir(subset_folder))
+                total_files += len(list_files(os.path.join(folder, subset)))
 
         update_status(f"📄 Found {total_files} total files to merge")
 
         # Process each folder
-        for folder, name in [(train_folder, "train"), (valid_folder, "valid"), (test_folder, "test")]:
+        planned = []
+        for folder, name in datasets:
             update_status(f"\n📁 Processing {name} folder...")
-            
-            for subset in ["images", "labels"]:
-                subset_folder = os.path.join(folder, subset)
-                if not os.path.exists(subset_folder):
-                    update_status(f"⚠️ Missing {subset} folder in {name}")
-                    continue
-                    
-                for item in os.listdir(subset_folder):
-                    source_path = os.path.join(subset_folder, item)
-                    target_path = os.path.join(images_output if subset == "images" else labels_output, item)
-                    shutil.copy(source_path, target_path)
-                    processed_files += 1
-                    
-                    # Update progress
-                    progress = (processed_files / total_files) * 100
-                    progress_bar['value'] = progress
-                    progress_label.config(text=f"{progress:.1f}%")
-                    root.update_idletasks()
+            digests = {} if dedup else None
+            if is_shard_folder(folder):
+                update_status(f"📦 Reading tar shards from {folder}")
+                members = load_shard_index(folder)
+                samples = [[("labels" if member[1].endswith(".txt") else "images", member[1], member)
+                            for member in sample]
+                           for sample in group_samples(members)]
+                if dedup:
+                    digests = member_digests(members, transfer_threads)
+            else:
+                samples = folder_samples(folder, name, digests)
+            planned.append((folder, samples, digests))
+
+        # Files whose names are taken are always renamed, so no two datasets write the same output file
+        samples, report = plan_merge(planned, skip_duplicates=dedup)
+        total_files = sum(len(sample) for sample in samples)
+
+        for sample in samples:
+            if shard_mb:
+                write_shard([(item, read_data(source)) for _, item, source in sample])
+                processed_files += len(sample)
+                show_progress(processed_files, total_files)
+            else:
+                transfer_jobs.extend((source, os.path.join(images_output if subset == "images" else labels_output, item))
+                                     for subset, item, source in sample)
+
+        if shard_mb:
+            close_shards()
+        if transfer_jobs:
+            update_status(f"\n🚚 Transferring {len(transfer_jobs)} files ({transfer_mode}, {transfer_threads} threads)...")
+            stats = transfer_files(transfer_jobs, transfer_mode, transfer_threads,
+                                   progress=lambda files, _: show_progress(files, total_files))
+            processed_files = stats["files"]
 
         # Final summary
         update_status("\n📊 Merge Summary:")
         update_status(f"Total files processed: {processed_files}")
+        update_status(f"Classes: {format_histogram(merged_histogram(samples))}")
+        update_status(f"Output: {output_mode(shard_mb, transfer_mode, stats)}")
+        if stats:
+            update_status(f"📈 {format_rate(stats)}")
+        if dedup:
+            update_status(f"🧬 Skipped {len(report['duplicates'])} duplicate images "
+                          f"({len(report['label_conflicts'])} with different labels)")
+        if report["renamed"]:
+            update_status(f"✏️ Renamed {len(report['renamed'])} files whose names were taken")
+        if dedup or report["renamed"]:
+            update_status(f"Report: {write_report(merged_folder, report)}")
         update_status(f"Merged dataset location: {merged_folder}")
         update_status("\n✨ Dataset merge completed successfully!")
 
@@ -203,7 +475,7 @@ def merge_dataset():
 # GUI Setup
 root = TkinterDnD.Tk()
 root.title("Dataset Split and Merge Tool")
-root.geometry("800x900")
+root.geometry("800x1280")
 root.configure(padx=20, pady=20)
 
 notebook = ttk.Notebook(root)
@@ -218,7 +490,8 @@ instructions_frame = tk.LabelFrame(split_tab, text="Instructions", padx=10, pady
 instructions_frame.pack(fill="x", pady=5)
 
 instructions_text = """Requirements:
-- Source folder must contain two subfolders: 'images' and 'labels'
+- Source folder must contain two subfolders: 'images' and 'labels',
+  or tar shards written by these tools
 - Images: Supported formats are PNG and JPG
 - Labels: Must be YOLO format TXT files
 - Filenames: Label files must match image names (e.g., image1.png → image1.txt)
@@ -280,6 +553,18 @@ valid_ratio_entry.insert(0, "0.2")
 
 tk.Label(ratio_frame, text="Test Ratio: (auto-calculated)").grid(row=2, column=0, columnspan=2, sticky="w", pady=2)
 
+tk.Label(ratio_frame, text="Assignment:").grid(row=3, column=0, sticky="w", pady=2)
+split_assignment_var = tk.StringVar(value="Random shuffle")
+tk.OptionMenu(ratio_frame, split_assignment_var, *SPLIT_ASSIGNMENTS).grid(row=3, column=1, sticky="w", pady=2)
+
+list_split_var = tk.BooleanVar(value=False)
+tk.Checkbutton(ratio_frame, text="Write list files only (train.txt, val.txt, test.txt and data.yaml, no copies)",
+               variable=list_split_var).grid(row=4, column=0, columnspan=2, sticky="w", pady=2)
+
+stats_report_var = tk.BooleanVar(value=True)
+tk.Checkbutton(ratio_frame, text="Write statistics of every subset (dataset_stats.json, .html and .png)",
+               variable=stats_report_var).grid(row=5, column=0, columnspan=2, sticky="w", pady=2)
+
 split_button = tk.Button(split_tab, text="Split Dataset", command=split_dataset)
 split_button.pack(pady=10)
 
@@ -356,9 +641,55 @@ merged_output_button = tk.Button(merged_output_frame, text="Select Output Folder
                                command=lambda: select_folder(merged_output_label))
 merged_output_button.pack(pady=5)
 
+# Any number of further datasets (e.g. deliveries from several labeling vendors)
+extra_frame = tk.LabelFrame(merge_tab, text="More Datasets (optional)", padx=10, pady=5)
+extra_frame.pack(fill="x", pady=5)
+
+extra_datasets = tk.Listbox(extra_frame, height=4, bg="white", relief="solid")
+extra_datasets.pack(fill="x", pady=5)
+extra_datasets.drop_target_register(DND_FILES)
+extra_datasets.dnd_bind('<<Drop>>', lambda e: add_datasets(root.tk.splitlist(e.data)))
+
+extra_buttons = tk.Frame(extra_frame)
+extra_buttons.pack()
+tk.Button(extra_buttons, text="Add Dataset",
+          command=lambda: add_datasets([filedialog.askdirectory()])).pack(side=tk.LEFT, padx=5)
+tk.Button(extra_buttons, text="Remove Selected",
+          command=lambda: [extra_datasets.delete(i) for i in reversed(extra_datasets.curselection())]).pack(side=tk.LEFT, padx=5)
+
+dedup_var = tk.BooleanVar(value=False)
+tk.Checkbutton(merge_tab, text="Skip duplicate images (same content); files with taken names are always renamed",
+               variable=dedup_var).pack(anchor="w", pady=2)
+
 merge_button = tk.Button(merge_tab, text="Merge Dataset", command=merge_dataset)
 merge_button.pack(pady=10)
 
+# Shard output and transfer mode (shared between tabs)
+shard_frame = tk.LabelFrame(root, text="Output Options", padx=10, pady=5)
+shard_frame.pack(fill="x", pady=5)
+
+shard_var = tk.BooleanVar(value=False)
+tk.Checkbutton(shard_frame, text="Write tar shards (image+label pairs, readable by Split and Merge)",
+               variable=shard_var).grid(row=0, column=0, columnspan=2, sticky="w", pady=2)
+
+tk.Label(shard_frame, text="Shard Size (MB):").grid(row=1, column=0, sticky="w", pady=2)
+shard_size_entry = tk.Entry(shard_frame)
+shard_size_entry.grid(row=1, column=1, pady=2)
+shard_size_entry.insert(0, str(DEFAULT_SHARD_MB))
+
+tk.Label(shard_frame, text="File Transfer (links fall back to copies):").grid(row=2, column=0, sticky="w", pady=2)
+transfer_var = tk.StringVar(value="copy")
+tk.OptionMenu(shard_frame, transfer_var, *LINK_MODES).grid(row=2, column=1, sticky="w", pady=2)
+
+tk.Label(shard_frame, text="Transfer Threads:").grid(row=3, column=0, sticky="w", pady=2)
+transfer_threads_entry = tk.Entry(shard_frame)
+transfer_threads_entry.grid(row=3, column=1, pady=2)
+transfer_threads_entry.insert(0, str(DEFAULT_TRANSFER_THREADS))
+
+index_cache_var = tk.BooleanVar(value=False)
+tk.Checkbutton(shard_frame, text=f"Keep a file index ({INDEX_CACHE_NAME}) in source datasets to speed up reruns",
+               variable=index_cache_var).grid(row=4, column=0, columnspan=2, sticky="w", pady=2)
+
 # Progress bar (shared between tabs)
 progress_frame = tk.Frame(root)
 progress_frame.pack(fill="x", pady=5)
@@ -0,0 +1,354 @@
+"""Dataset statistics: class counts, boxes per image, box sizes, image resolutions and background ratio.
+
+Images are read in chunks on a thread pool and added to fixed-bin histograms,
+so memory does not grow with the number of images. Labels of a loose labels
+folder come from its label cache (see label_cache), so unchanged label files
+are never read again; shard labels are read with the images. Image sizes come from
+the file header alone (JPEG, PNG, BMP, GIF and WebP are parsed directly,
+anything else through Pillow if it is installed), the pixels are never
+decoded.
+
+    python dataset_stats.py dataset [--output folder] [--threads 16]
+
+dataset is an images/labels folder, a tar shard folder, or a split output with
+train/valid/test subfolders (one report per subset). The report is written as
+dataset_stats.json and dataset_stats.html, plus dataset_stats.png if
+matplotlib is installed.
+"""
+import argparse
+import html
+import json
+import os
+import struct
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+except ImportError:
+    plt = None
+
+from dataset_index import image_path, label_path, scan_dataset
+from dataset_labels import READ_THREADS, SUBSETS, parse_labels, read_sources
+from label_cache import file_labels, file_positions, update_label_cache
+from dataset_shards import is_shard_folder, read_shard_dataset
+
+STATS_NAME = "dataset_stats"
+CHUNK_SIZE = 4096
+
+# Fixed histogram bins. Box width and height are fractions of the image, area bins are
+# log10 of the area fraction, and the last boxes-per-image bin counts everything above.
+SIZE_BINS = 20
+AREA_LOG_RANGE = (-6.0, 0.0)
+AREA_BINS = 24
+MAX_BOXES_PER_IMAGE = 50
+# COCO object sizes in pixels: small below 32x32, medium below 96x96, large above
+OBJECT_SIZES = (("small", 32 ** 2), ("medium", 96 ** 2), ("large", np.inf))
+JPEG_SIZE_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+def open_source(source):
+    """Return (open file, start offset) of a file path or shard member."""
+    if isinstance(source, str):
+        return open(source, "rb"), 0
+    shard_path, _, offset, _ = source
+    return open(shard_path, "rb"), offset
+
+def jpeg_size(f, start):
+    # Walk the segments up to the first start-of-frame marker, which holds the size
+    f.seek(start + 2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            continue  # No length field
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        if marker in JPEG_SIZE_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        f.seek(struct.unpack(">H", length)[0] - 2, os.SEEK_CUR)
+
+def header_size(head):
+    """Return (width, height) from the first 32 bytes of a PNG, GIF, BMP or WebP file, or None."""
+    if head.startswith(b"\x89PNG\r\n\x1a\n") and len(head) >= 24:
+        return struct.unpack(">II", head[16:24])
+    if head[:6] in (b"GIF87a", b"GIF89a") and len(head) >= 10:
+        return struct.unpack("<HH", head[6:10])
+    if head.startswith(b"BM") and len(head) >= 26:
+        width, height = struct.unpack("<ii", head[18:26])
+        return width, abs(height)  # Negative height: rows stored top-down
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP" and len(head) >= 30:
+        chunk = head[12:16]
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", head[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(head[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+def image_size(source):
+    """Return (width, height) of an image path or shard member from its header, or None if unreadable."""
+    try:
+        f, start = open_source(source)
+        with f:
+            f.seek(start)
+            head = f.read(32)
+            if head.startswith(b"\xff\xd8"):
+                return jpeg_size(f, start)
+            dimensions = header_size(head)
+            if dimensions is None and Image is not None:
+                f.seek(start)
+                with Image.open(f) as image:  # Pillow only parses the header until pixels are needed
+                    dimensions = image.size
+            return dimensions
+    except (OSError, ValueError, struct.error):
+        return None
+
+def empty_stats():
+    """Return the accumulators collect_stats() adds chunks to."""
+    return {
+        "images": 0,
+        "unreadable_images": 0,
+        "missing_labels": 0,
+        "background_images": 0,
+        "invalid_lines": 0,
+        "boxes_per_class": np.zeros(0, dtype=np.int64),
+        "images_per_class": np.zeros(0, dtype=np.int64),
+        "boxes_per_image": np.zeros(MAX_BOXES_PER_IMAGE + 2, dtype=np.int64),
+        "box_width": np.zeros(SIZE_BINS, dtype=np.int64),
+        "box_height": np.zeros(SIZE_BINS, dtype=np.int64),
+        "box_area": np.zeros(AREA_BINS, dtype=np.int64),
+        "object_sizes": np.zeros(len(OBJECT_SIZES), dtype=np.int64),
+        "resolutions": Counter(),
+    }
+
+def add_counts(total, counts):
+    # Class histograms grow to the highest class id seen so far
+    if len(counts) > len(total):
+        total = np.concatenate((total, np.zeros(len(counts) - len(total), dtype=np.int64)))
+    total[:len(counts)] += counts
+    return total
+
+def fraction_bins(values, bins):
+    return np.bincount(np.clip((values * bins).astype(np.int64), 0, bins - 1), minlength=bins)
+
+def add_chunk(stats, sizes, labels, image_count, missing_labels):
+    """Add one chunk: image sizes ((w, h) or None per image) and LabelArrays with image ids 0..image_count-1."""
+    valid = (labels.classes >= 0) & (labels.columns == 5) & ~np.isnan(labels.boxes).any(axis=1)
+    image_ids, classes, boxes = labels.image_ids[valid], labels.classes[valid], labels.boxes[valid].astype(np.float64)
+    stats["images"] += image_count
+    stats["missing_labels"] += missing_labels
+    stats["invalid_lines"] += int((~valid).sum())
+
+    per_image = np.bincount(image_ids, minlength=image_count)
+    stats["background_images"] += int((per_image == 0).sum())
+    stats["boxes_per_image"] += np.bincount(np.minimum(per_image, MAX_BOXES_PER_IMAGE + 1),
+                                            minlength=MAX_BOXES_PER_IMAGE + 2)
+    stats["boxes_per_class"] = add_counts(stats["boxes_per_class"], np.bincount(classes))
+    class_count = int(classes.max()) + 1 if len(classes) else 1
+    pairs = np.unique(image_ids.astype(np.int64) * class_count + classes)  # One per image and class
+    stats["images_per_class"] = add_counts(stats["images_per_class"], np.bincount(pairs % class_count))
+
+    width, height = np.clip(boxes[:, 2], 0, 1), np.clip(boxes[:, 3], 0, 1)
+    stats["box_width"] += fraction_bins(width, SIZE_BINS)
+    stats["box_height"] += fraction_bins(height, SIZE_BINS)
+    low, high = AREA_LOG_RANGE
+    area_log = np.log10(np.maximum(width * height, 10 ** low))
+    stats["box_area"] += fraction_bins((area_log - low) / (high - low), AREA_BINS)
+
+    # Box sizes in pixels, for the images whose size is known
+    pixels = np.array([size if size is not None else (0, 0) for size in sizes], dtype=np.float64).reshape(-1, 2)
+    known = pixels[image_ids, 0] > 0
+    pixel_area = width[known] * pixels[image_ids[known], 0] * height[known] * pixels[image_ids[known], 1]
+    limits = [limit for _, limit in OBJECT_SIZES[:-1]]
+    stats["object_sizes"] += np.bincount(np.searchsorted(limits, pixel_area, side="right"),
+                                         minlength=len(OBJECT_SIZES))
+    stats["unreadable_images"] += sum(size is None for size in sizes)
+    stats["resolutions"].update(f"{w}x{h}" for w, h in (size for size in sizes if size is not None))
+
+def cached_item_files(label_sources, threads=READ_THREADS):
+    """Return (label cache, cache position of every label source) if they are files of one folder, else None.
+
+    Only the positions are per item; the boxes stay in the cache until a chunk copies out its own.
+    """
+    folders = {os.path.dirname(source) if isinstance(source, str) else None
+               for source in label_sources if source is not None}
+    if len(folders) != 1 or None in folders:
+        return None
+    cache, _ = update_label_cache(folders.pop(), threads)
+    names = [os.path.basename(source) if source is not None else None for source in label_sources]
+    return cache, file_positions(cache, names)
+
+def collect_stats(items, threads=READ_THREADS, progress=None):
+    """Return the stats of (image source, label source or None) items, read in chunks on a thread pool.
+
+    progress(done, total) is called after every chunk.
+    """
+    stats = empty_stats()
+    cached = cached_item_files([label_source for _, label_source in items], threads)
+    with ThreadPoolExecutor(max_workers=max(threads, 1)) as pool:
+        for start in range(0, len(items), CHUNK_SIZE):
+            chunk = items[start:start + CHUNK_SIZE]
+            sizes = pool.map(image_size, [image_source for image_source, _ in chunk], chunksize=64)
+            label_sources = [label_source for _, label_source in chunk]
+            if cached is not None:
+                cache, files = cached
+                labels = file_labels(cache, files[start:start + len(chunk)])
+            else:
+                labels = parse_labels(read_sources(label_sources, threads))
+            add_chunk(stats, list(sizes), labels, len(chunk), label_sources.count(None))
+            if progress is not None:
+                progress(min(start + CHUNK_SIZE, len(items)), len(items))
+    return stats
+
+def histogram_report(counts, edges):
+    return {"edges": [round(float(edge), 6) for edge in edges], "counts": counts.tolist()}
+
+def stats_report(stats):
+    """Turn accumulated stats into a JSON-ready report."""
+    images = stats["images"]
+    boxes = int(stats["boxes_per_class"].sum())
+    low, high = AREA_LOG_RANGE
+    per_image = [str(count) for count in range(MAX_BOXES_PER_IMAGE + 1)] + [f"{MAX_BOXES_PER_IMAGE + 1}+"]
+    return {
+        "images": images,
+        "boxes": boxes,
+        "background_images": stats["background_images"],
+        "background_ratio": round(stats["background_images"] / images, 4) if images else 0.0,
+        "missing_labels": stats["missing_labels"],
+        "invalid_lines": stats["invalid_lines"],
+        "unreadable_images": stats["unreadable_images"],
+        "mean_boxes_per_image": round(boxes / images, 3) if images else 0.0,
+        "boxes_per_class": {class_id: int(count) for class_id, count in enumerate(stats["boxes_per_class"]) if count},
+        "images_per_class": {class_id: int(count) for class_id, count in enumerate(stats["images_per_class"])
+                             if count},
+        "boxes_per_image": dict(zip(per_image, stats["boxes_per_image"].tolist())),
+        "box_width": histogram_report(stats["box_width"], np.linspace(0, 1, SIZE_BINS + 1)),
+        "box_height": histogram_report(stats["box_height"], np.linspace(0, 1, SIZE_BINS + 1)),
+        "box_area_log10": histogram_report(stats["box_area"], np.linspace(low, high, AREA_BINS + 1)),
+        "object_sizes": {name: int(count) for (name, _), count in zip(OBJECT_SIZES, stats["object_sizes"])},
+        "resolutions": dict(stats["resolutions"].most_common()),
+    }
+
+def format_summary(report):
+    """Describe a report in one line, e.g. "1200 images, 3400 boxes (2.83 per image), 4.0% background"."""
+    return (f"{report['images']} images, {report['boxes']} boxes ({report['mean_boxes_per_image']} per image), "
+            f"{report['background_ratio']:.1%} background")
+
+def html_bars(title, counts):
+    # One row per bin, the bar width relative to the largest bin
+    largest = max(counts.values(), default=0) or 1
+    rows = "".join(f"<tr><td>{html.escape(str(label))}</td><td><div class='bar' style='width:{count / largest * 300:.0f}px'>"
+                   f"</div></td><td>{count}</td></tr>" for label, count in counts.items())
+    return f"<h3>{html.escape(title)}</h3><table>{rows}</table>"
+
+def edge_labels(histogram, digits=2):
+    edges = histogram["edges"]
+    return {f"{edges[i]:.{digits}f}-{edges[i + 1]:.{digits}f}": count for i, count in enumerate(histogram["counts"])}
+
+def write_html(path, reports):
+    sections = []
+    for name, report in reports.items():
+        resolutions = dict(list(report["resolutions"].items())[:20])
+        sections.append(
+            f"<h2>{html.escape(name)}</h2><p>{html.escape(format_summary(report))}, "
+            f"{report['missing_labels']} without a label file, {report['invalid_lines']} invalid label lines, "
+            f"{report['unreadable_images']} unreadable images</p>"
+            + html_bars("Boxes per class", report["boxes_per_class"])
+            + html_bars("Images per class", report["images_per_class"])
+            + html_bars("Boxes per image", {label: count for label, count in report["boxes_per_image"].items() if count})
+            + html_bars("Box width (fraction of the image)", edge_labels(report["box_width"]))
+            + html_bars("Box height (fraction of the image)", edge_labels(report["box_height"]))
+            + html_bars("Box area (log10 of the image fraction)", edge_labels(report["box_area_log10"]))
+            + html_bars("Object size (COCO, pixels)", report["object_sizes"])
+            + html_bars("Image resolution (top 20)", resolutions))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html><html><head><meta charset='utf-8'><title>Dataset statistics</title><style>"
+                "body{font-family:sans-serif} td{padding:1px 6px} .bar{background:#4a7ebb;height:12px}"
+                "</style></head><body><h1>Dataset statistics</h1>" + "".join(sections) + "</body></html>")
+
+def write_png(path, reports):
+    # One row of plots per report
+    figure, axes = plt.subplots(len(reports), 4, figsize=(16, 3.2 * len(reports)), squeeze=False)
+    for row, (name, report) in zip(axes, reports.items()):
+        row[0].bar([str(class_id) for class_id in report["boxes_per_class"]], list(report["boxes_per_class"].values()))
+        row[0].set_title(f"{name}: boxes per class")
+        row[1].bar(list(report["boxes_per_image"]), list(report["boxes_per_image"].values()))
+        row[1].set_title("boxes per image")
+        row[1].set_xticks(row[1].get_xticks()[::10])
+        for histogram, label in ((report["box_width"], "width"), (report["box_height"], "height")):
+            row[2].stairs(histogram["counts"], histogram["edges"], label=label)
+        row[2].set_title("box width / height")
+        row[2].legend()
+        row[3].stairs(report["box_area_log10"]["counts"], report["box_area_log10"]["edges"], fill=True)
+        row[3].set_title("box area (log10)")
+    figure.tight_layout()
+    figure.savefig(path, dpi=80)
+    plt.close(figure)
+
+def write_stats(output_folder, reports):
+    """Write {name: report} as JSON, HTML and, with matplotlib, PNG; return the written paths."""
+    os.makedirs(output_folder, exist_ok=True)
+    base = os.path.join(output_folder, STATS_NAME)
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(reports, f, indent=2)
+    write_html(base + ".html", reports)
+    paths = [base + ".json", base + ".html"]
+    if plt is not None and reports:
+        write_png(base + ".png", reports)
+        paths.append(base + ".png")
+    return paths
+
+def dataset_items(folder):
+    """Return the (image source, label source or None) items of an images/labels folder or a shard folder."""
+    if is_shard_folder(folder):
+        images, labels = read_shard_dataset(folder)
+        return [(member, labels.get(stem)) for stem, member in images.items()]
+    index = scan_dataset(folder)
+    return [(image_path(index, stem), label_path(index, stem)) for stem in index.images]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folder", help="images/labels folder, tar shard folder, or split output with train/valid/test")
+    parser.add_argument("--output", help="folder for the reports (default: the dataset folder)")
+    parser.add_argument("--threads", type=int, default=READ_THREADS, help="threads reading images and labels")
+    args = parser.parse_args()
+    if not os.path.isdir(args.folder):
+        parser.error(f"{args.folder} is not a folder")
+
+    subsets = [subset for subset in SUBSETS if os.path.isdir(os.path.join(args.folder, subset))]
+    folders = {subset: os.path.join(args.folder, subset) for subset in subsets} or \
+        {os.path.basename(os.path.normpath(args.folder)): args.folder}
+    reports = {}
+    for name, folder in folders.items():
+        stats = collect_stats(dataset_items(folder), args.threads,
+                              lambda done, total: print(f"\r{name}: {done}/{total} images", end="", flush=True))
+        reports[name] = stats_report(stats)
+        print(f"\r{name}: {format_summary(reports[name])}")
+    for path in write_stats(args.output or args.folder, reports):
+        print(f"Report: {path}")
+
+if __name__ == "__main__":
+    main()
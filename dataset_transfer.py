@@ -0,0 +1,232 @@
+"""Copy or link dataset files into split and merged datasets.
+
+"hardlink" and "reflink" (a copy-on-write clone on Btrfs, XFS and similar
+filesystems) take no extra space and finish instantly, "symlink" points at the
+source file. Whenever a link is not possible, e.g. across devices or on a
+filesystem without clone support, the file is copied instead.
+
+transfer_files() runs many transfers on a thread pool, which keeps network
+filesystems and SSDs busy, and copies use copy_file_range/sendfile so the data
+never passes through Python.
+"""
+import errno
+import os
+import shutil
+import stat
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from dataset_shards import read_member
+
+LINK_MODES = ("copy", "hardlink", "reflink", "symlink")
+DEFAULT_TRANSFER_THREADS = 8
+
+# copy_file_range/sendfile move at most this much per call
+COPY_CHUNK = 64 * 1024 * 1024
+
+# Linux FICLONE ioctl, _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# Errors that mean "this kind of link can't be made here", not that the copy itself would fail
+LINK_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EINVAL, errno.ENOTTY}
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+def copy_data(source_fd, target_fd, size):
+    """Copy size bytes between file descriptors in the kernel, falling back to a read/write loop."""
+    copied = 0
+    for copy in (getattr(os, "copy_file_range", None), getattr(os, "sendfile", None)):
+        if copy is None:
+            continue
+        try:
+            while copied < size:
+                if copy is os.sendfile:
+                    sent = os.sendfile(target_fd, source_fd, copied, min(COPY_CHUNK, size - copied))
+                else:
+                    sent = os.copy_file_range(source_fd, target_fd, min(COPY_CHUNK, size - copied), copied, copied)
+                if sent == 0:
+                    return copied
+                copied += sent
+            return copied
+        except OSError as e:
+            # Not supported for this pair of files (e.g. older kernels, some network filesystems), try the next way
+            if e.errno not in LINK_ERRNOS | {errno.ENOSYS} or copied:
+                raise
+    os.lseek(source_fd, copied, os.SEEK_SET)
+    while True:
+        chunk = os.read(source_fd, 1024 * 1024)
+        if not chunk:
+            return copied
+        os.write(target_fd, chunk)
+        copied += len(chunk)
+
+def fast_copy(source, target):
+    """Copy a file with its permission bits like shutil.copy, and return the bytes copied."""
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        copied = copy_data(src.fileno(), dst.fileno(), os.fstat(src.fileno()).st_size)
+    shutil.copymode(source, target)
+    return copied
+
+def reflink(source, target):
+    if fcntl is None:
+        raise OSError(errno.ENOTSUP, "Reflinks are not supported on this platform", source)
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.remove(target)
+            raise
+    shutil.copystat(source, target)
+
+def remove_existing(source, target):
+    # Links can't replace a file the way shutil.copy overwrites one, but never remove the source itself
+    target_entry = os.path.join(os.path.realpath(os.path.dirname(target) or "."), os.path.basename(target))
+    if os.path.realpath(source) == target_entry:
+        raise shutil.SameFileError(f"{source} and {target} are the same file")
+    if os.path.lexists(target):
+        os.remove(target)
+
+def is_current(source, target):
+    """Return True if target already holds source: a link to it, or a plain copy at least as new with the same size.
+
+    A target that links to any other file (e.g. from an earlier run over another dataset) is never current.
+    """
+    try:
+        target_stat = os.lstat(target)
+    except FileNotFoundError:
+        return False
+    if stat.S_ISLNK(target_stat.st_mode):
+        return isinstance(source, str) and os.path.realpath(target) == os.path.realpath(source)
+    if isinstance(source, str):
+        source_stat = os.stat(source)
+        if os.path.samestat(source_stat, target_stat):
+            return True  # A hard link to the source
+        size = source_stat.st_size
+    else:
+        source_stat = os.stat(source[0])  # A shard member is as new as its shard
+        size = source[3]
+    if target_stat.st_nlink > 1:
+        return False  # A hard link to another file
+    return target_stat.st_size == size and target_stat.st_mtime >= source_stat.st_mtime
+
+def transfer_file(source, target, mode="copy", update=False):
+    """Copy or link source (a path or a shard member) to target and return the mode actually used.
+
+    Shard members are always copied, and a link that can't be made falls back to a copy.
+    With update, a target that is already current is left alone and "current" is returned.
+    """
+    if update and is_current(source, target):
+        return "current"
+    if not isinstance(source, str):
+        # Replace the target instead of writing through it, it may still link to a source file
+        with open(target + ".tmp", "wb") as f:
+            f.write(read_member(source))
+        os.replace(target + ".tmp", target)
+        return "copy"
+    remove_existing(source, target)
+    if mode == "copy":
+        fast_copy(source, target)
+        return "copy"
+    try:
+        if mode == "hardlink":
+            os.link(source, target)
+        elif mode == "reflink":
+            reflink(source, target)
+        elif mode == "symlink":
+            os.symlink(os.path.abspath(source), target)
+        else:
+            raise ValueError(f"Unknown transfer mode {mode}, expected one of {', '.join(LINK_MODES)}")
+        return mode
+    except OSError as e:
+        if e.errno not in LINK_ERRNOS:
+            raise
+    fast_copy(source, target)
+    return "copy"
+
+def describe_modes(mode, used):
+    """Summarize a {mode: file count} tally for the chosen transfer mode, e.g. "hardlink (3 files copied)"."""
+    fallback = sum(count for used_mode, count in used.items() if used_mode not in (mode, "current"))
+    if mode == "copy" or not fallback:
+        return mode
+    return f"{mode} ({fallback} files copied instead, e.g. across devices or from shards)"
+
+def source_size(source):
+    return os.path.getsize(source) if isinstance(source, str) else source[3]
+
+def transfer_files(jobs, mode="copy", threads=DEFAULT_TRANSFER_THREADS, progress=None, progress_interval=0.1,
+                   update=False):
+    """Transfer (source, target) pairs on a thread pool and return a stats dict.
+
+    Only pairs that are passed in are transferred, so callers decide which
+    optional files (like labels without an image) to include. When several
+    pairs share a target the last one wins, as with sequential copies. jobs
+    can be a generator, it is read as the pool frees up so memory stays
+    bounded. progress(files, bytes) is called from the calling thread at most
+    every progress_interval seconds, which keeps GUI updates off the worker
+    threads and cheap. With update, targets that are already current are
+    skipped (see is_current) and counted under the "current" mode.
+    The stats hold files, bytes, seconds and modes, a Counter of the modes used.
+    """
+    stats = {"files": 0, "bytes": 0, "seconds": 0.0, "modes": Counter()}
+    start = last_report = time.perf_counter()
+
+    def run(source, target):
+        used_mode = transfer_file(source, target, mode, update)
+        return used_mode, 0 if used_mode == "current" else source_size(source)
+
+    def finish(future):
+        used_mode, size = future.result()
+        stats["modes"][used_mode] += 1
+        stats["files"] += 1
+        stats["bytes"] += size
+
+    jobs = iter(jobs)
+    threads = max(threads, 1)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        in_flight = set()
+        targets = {}  # target -> future, for the transfers in flight
+        exhausted = False
+        while in_flight or not exhausted:
+            # Keep a bounded number of futures queued instead of one per file
+            while not exhausted and len(in_flight) < threads * 4:
+                job = next(jobs, None)
+                if job is None:
+                    exhausted = True
+                    continue
+                # Two threads must never write the same target: let the earlier transfer finish, the later one wins
+                earlier = targets.pop(job[1], None)
+                if earlier is not None:
+                    wait([earlier])
+                    in_flight.discard(earlier)
+                    finish(earlier)
+                future = pool.submit(run, *job)
+                future.target = job[1]
+                targets[job[1]] = future
+                in_flight.add(future)
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                del targets[future.target]
+                finish(future)
+            now = time.perf_counter()
+            if progress is not None and now - last_report >= progress_interval:
+                progress(stats["files"], stats["bytes"])
+                last_report = now
+    stats["seconds"] = time.perf_counter() - start
+    if progress is not None:
+        progress(stats["files"], stats["bytes"])
+    return stats
+
+def format_rate(stats):
+    """Describe transfer stats, e.g. "1200 files, 350.2 MB in 4.1 s (292.7 files/s, 85.4 MB/s)"."""
+    seconds = max(stats["seconds"], 1e-9)
+    megabytes = stats["bytes"] / 1e6
+    return (f"{stats['files']} files, {megabytes:.1f} MB in {stats['seconds']:.1f} s "
+            f"({stats['files'] / seconds:.1f} files/s, {megabytes / seconds:.1f} MB/s)")
@@ -2,6 +2,9 @@ import tkinter as tk
 from tkinter import filedialog, ttk, scrolledtext
 import os
 from pathlib import Path
+from dataset_cache import has_cache, label_cache_folder, load_labels
+from label_cache import files_with_classes, label_cache_path, update_label_cache
+from label_remap import describe_mapping, find_label_files, parse_mapping, remap_files
 
 # First try to import tkinterdnd2
 try:
@@ -45,6 +48,28 @@ def update_status(message):
     status_text.see(tk.END)  # Auto-scroll to the bottom
     root.update_idletasks()
 
+def show_progress(done, total):
+    progress = (done / total) * 100 if total else 100
+    progress_bar['value'] = progress
+    progress_label.config(text=f"{progress:.1f}%")
+    root.update_idletasks()
+
+def unaffected_by_index(labels_dir, mapping):
+    """Return the label paths in labels_dir that the label cache or the persistent index know hold none of the mapped classes."""
+    if os.path.exists(label_cache_path(labels_dir)):
+        cache, _ = update_label_cache(labels_dir)
+        affected = files_with_classes(cache, mapping)
+        return {os.path.join(labels_dir, name) for name in cache.names.tolist() if name not in affected}
+    if not has_cache(label_cache_folder(labels_dir)[0]):
+        return set()  # No index to ask, and this tool never creates one in the folder
+    entries, _ = load_labels(labels_dir)
+    unaffected = set()
+    for name, entry in entries.items():
+        classes = entry.classes.split() if entry.classes is not None else None
+        if classes is not None and all(c.isdigit() for c in classes) and not set(mapping) & set(map(int, classes)):
+            unaffected.add(os.path.join(labels_dir, name))
+    return unaffected
+
 def fix_labels():
     labels_dir = folder_label.cget("text")
     if labels_dir == "Drag a labels folder here or click 'Select Folder'":
@@ -56,13 +81,27 @@ def fix_labels():
         if not labels_path.is_dir():
             update_status("❌ Error: Not a valid directory")
             return
+        try:
+            mapping = parse_mapping(mapping_entry.get())
+        except ValueError as e:
+            update_status(f"❌ Error: {e}")
+            return
+        try:
+            workers = int(workers_entry.get())
+            if workers < 1:
+                raise ValueError
+        except ValueError:
+            update_status("❌ Error: Workers must be a whole number of at least 1")
+            return
+        dry_run = dry_run_var.get()
 
         # Clear status text and start new processing
         status_text.delete(1.0, tk.END)
         update_status(f"📂 Processing folder: {labels_dir}")
+        update_status(f"🔁 Mapping: {describe_mapping(mapping)}" + (" (dry run, nothing is written)" if dry_run else ""))
         
         # Count total files first
-        txt_files = list(labels_path.glob('*.txt'))
+        txt_files = find_label_files(labels_dir, subfolders_var.get())
         total_files = len(txt_files)
         
         if total_files == 0:
@@ -70,123 +109,119 @@ def fix_labels():
             return
         
         update_status(f"📄 Found {total_files} .txt files")
-        modified_count = 0
-        processed_count = 0
-        
-        for label_file in txt_files:
-            modified = False
-            new_lines = []
-            modified_lines = 0
-            
-            with open(label_file, 'r') as f:
-                lines = f.readlines()
-                
-                for line in lines:
-                    parts = line.strip().split()
-                    
-                    if parts and parts[0] == '1':
-                        new_line = '0 ' + ' '.join(parts[1:]) + '\n'
-                        modified = True
-                        modified_lines += 1
-                    else:
-                        new_line = line
-                        
-                    new_lines.append(new_line)
-            
-            if modified:
-                with open(label_file, 'w') as f:
-                    f.writelines(new_lines)
-                modified_count += 1
-                update_status(f"✅ Modified {label_file.name} ({modified_lines} lines changed)")
-            else:
-                update_status(f"ℹ️ Skipped {label_file.name} (no changes needed)")
-            
-            processed_count += 1
-            
-            # Update progress
-            progress = (processed_count / total_files) * 100
-            progress_bar['value'] = progress
-            progress_label.config(text=f"{progress:.1f}%")
-            root.update_idletasks()
+        # Files the index knows to be unaffected aren't opened, the rest are pre-scanned by the workers
+        unaffected = unaffected_by_index(labels_dir, mapping)
+        txt_files = [path for path in txt_files if path not in unaffected]
+        if unaffected:
+            update_status(f"ℹ️ Skipped {len(unaffected)} files without the mapped classes (from the index)")
+
+        stats = remap_files(txt_files, mapping, dry_run, workers, progress=show_progress)
+        show_progress(1, 1)
+        for path, error in stats["errors"]:
+            update_status(f"❌ {os.path.relpath(path, labels_dir)}: {error}")
         
         # Final summary
         update_status("\n📊 Summary:")
         update_status(f"Total files processed: {total_files}")
-        update_status(f"Files modified: {modified_count}")
-        update_status(f"Files unchanged: {total_files - modified_count}")
+        update_status(f"Files {'to modify' if dry_run else 'modified'}: {stats['changed_files']}")
+        update_status(f"Boxes {'to relabel' if dry_run else 'relabeled'}: {stats['changed_lines']}")
+        update_status(f"Boxes {'to delete' if dry_run else 'deleted'}: {stats['deleted_lines']}")
+        update_status(f"Files unchanged: {total_files - stats['changed_files'] - len(stats['errors'])}")
         update_status("\n✨ Processing completed successfully!")
         
     except Exception as e:
         update_status(f"❌ Error: {str(e)}")
 
-# Create main window with DnD support
-root = TkinterDnD.Tk()
-root.title("YOLO Label Class Fixer")
-root.geometry("600x600")
-root.configure(padx=20, pady=20)
+if __name__ == "__main__":
+    # Create main window with DnD support
+    root = TkinterDnD.Tk()
+    root.title("YOLO Label Class Fixer")
+    root.geometry("600x720")
+    root.configure(padx=20, pady=20)
 
-# Create and pack widgets
-title_label = tk.Label(root, text="YOLO Label Class Fixer", font=("Helvetica", 16, "bold"))
-title_label.pack(pady=10)
+    # Create and pack widgets
+    title_label = tk.Label(root, text="YOLO Label Class Fixer", font=("Helvetica", 16, "bold"))
+    title_label.pack(pady=10)
 
-# Instructions
-usage_text = """
+    # Instructions
+    usage_text = """
 Instructions:
 1. Drag and drop your labels folder into the box below OR use the 'Select Folder' button
-2. Click 'Fix Labels' to convert all class 1 to class 0
-3. Watch the progress and status below
+2. Enter the class mapping, e.g. 1:0 (class 1 becomes 0), 2:0, 3:0 (merge 2 and 3 into 0)
+   or 5:delete (remove all class 5 boxes)
+3. Click 'Fix Labels' (tick 'Dry run' to only count the changes)
+4. Watch the progress and status below
 """
-usage_label = tk.Label(root, text=usage_text, justify=tk.LEFT, anchor="w")
-usage_label.pack(fill="x", pady=5)
-
-# Folder Selection Frame
-folder_frame = tk.Frame(root)
-folder_frame.pack(fill="x", pady=5)
-
-folder_label = tk.Label(
-    folder_frame, 
-    text="Drag a labels folder here or click 'Select Folder'",
-    anchor="w",
-    bg="white",
-    relief="solid",
-    padx=5
-)
-folder_label.pack(fill="x", ipady=20)
-
-# Configure drag and drop
-folder_label.drop_target_register(DND_FILES)
-folder_label.dnd_bind('<<Drop>>', drop_folder)
-folder_label.dnd_bind('<<DragEnter>>', lambda e: on_drag_enter(e))
-folder_label.dnd_bind('<<DragLeave>>', lambda e: on_drag_leave(e))
-
-# Buttons Frame
-button_frame = tk.Frame(root)
-button_frame.pack(fill="x", pady=10)
-
-folder_button = tk.Button(button_frame, text="Select Folder", command=select_folder)
-folder_button.pack(side=tk.LEFT, padx=5)
-
-process_button = tk.Button(button_frame, text="Fix Labels", command=fix_labels)
-process_button.pack(side=tk.LEFT, padx=5)
-
-# Progress Bar Frame
-progress_frame = tk.Frame(root)
-progress_frame.pack(fill="x", pady=5)
-
-progress_bar = ttk.Progressbar(
-    progress_frame,
-    orient="horizontal",
-    length=300,
-    mode="determinate"
-)
-progress_bar.pack(side=tk.LEFT, fill="x", expand=True)
-
-progress_label = tk.Label(progress_frame, text="0%", width=6)
-progress_label.pack(side=tk.LEFT, padx=5)
-
-# Status Text Area
-status_text = scrolledtext.ScrolledText(root, height=15, width=60)
-status_text.pack(fill="both", expand=True, pady=10)
-status_text.insert(tk.END, "Ready to process files...\n")
-
-root.mainloop()
\ No newline at end of file
+    usage_label = tk.Label(root, text=usage_text, justify=tk.LEFT, anchor="w")
+    usage_label.pack(fill="x", pady=5)
+
+    # Folder Selection Frame
+    folder_frame = tk.Frame(root)
+    folder_frame.pack(fill="x", pady=5)
+
+    folder_label = tk.Label(
+        folder_frame, 
+        text="Drag a labels folder here or click 'Select Folder'",
+        anchor="w",
+        bg="white",
+        relief="solid",
+        padx=5
+    )
+    folder_label.pack(fill="x", ipady=20)
+
+    # Configure drag and drop
+    folder_label.drop_target_register(DND_FILES)
+    folder_label.dnd_bind('<<Drop>>', drop_folder)
+    folder_label.dnd_bind('<<DragEnter>>', lambda e: on_drag_enter(e))
+    folder_label.dnd_bind('<<DragLeave>>', lambda e: on_drag_leave(e))
+
+    # Options Frame
+    options_frame = tk.Frame(root)
+    options_frame.pack(fill="x", pady=5)
+
+    tk.Label(options_frame, text="Class Mapping:").grid(row=0, column=0, sticky="w", pady=2)
+    mapping_entry = tk.Entry(options_frame, width=40)
+    mapping_entry.grid(row=0, column=1, sticky="w", pady=2)
+    mapping_entry.insert(0, "1:0")
+
+    tk.Label(options_frame, text="Workers:").grid(row=1, column=0, sticky="w", pady=2)
+    workers_entry = tk.Entry(options_frame, width=10)
+    workers_entry.grid(row=1, column=1, sticky="w", pady=2)
+    workers_entry.insert(0, str(os.cpu_count() or 1))
+
+    subfolders_var = tk.BooleanVar(value=True)
+    tk.Checkbutton(options_frame, text="Include subfolders", variable=subfolders_var).grid(row=2, column=0, columnspan=2, sticky="w")
+    dry_run_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(options_frame, text="Dry run (only count the changes)", variable=dry_run_var).grid(row=3, column=0, columnspan=2, sticky="w")
+
+    # Buttons Frame
+    button_frame = tk.Frame(root)
+    button_frame.pack(fill="x", pady=10)
+
+    folder_button = tk.Button(button_frame, text="Select Folder", command=select_folder)
+    folder_button.pack(side=tk.LEFT, padx=5)
+
+    process_button = tk.Button(button_frame, text="Fix Labels", command=fix_labels)
+    process_button.pack(side=tk.LEFT, padx=5)
+
+    # Progress Bar Frame
+    progress_frame = tk.Frame(root)
+    progress_frame.pack(fill="x", pady=5)
+
+    progress_bar = ttk.Progressbar(
+        progress_frame,
+        orient="horizontal",
+        length=300,
+        mode="determinate"
+    )
+    progress_bar.pack(side=tk.LEFT, fill="x", expand=True)
+
+    progress_label = tk.Label(progress_frame, text="0%", width=6)
+    progress_label.pack(side=tk.LEFT, padx=5)
+
+    # Status Text Area
+    status_text = scrolledtext.ScrolledText(root, height=15, width=60)
+    status_text.pack(fill="both", expand=True, pady=10)
+    status_text.insert(tk.END, "Ready to process files...\n")
+
+    root.mainloop()
@@ -0,0 +1,890 @@
+"""Frame extraction core shared by the video frame extractor tools.
+
+Kept free of any GUI code so it can be imported by worker processes.
+"""
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+import cv2
+import numpy as np
+
+from dataset_index import FRAME_SEPARATOR, assign_subset, frame_stem, video_group
+from dataset_shards import shard_writer
+from image_encoders import EXTENSIONS, make_encoder
+
+# PyAV is optional, without it every backend falls back to cv2.VideoCapture
+try:
+    import av
+except ImportError:
+    av = None
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov", ".flv", ".wmv", ".mpeg", ".mpg", ".3gp")
+
+# Sample periods at least this long (in seconds) seek straight to each sample
+# instead of grabbing through every frame in between.
+SEEK_MIN_PERIOD = 5.0
+
+BACKENDS = ("opencv", "pyav")
+
+# Written to the output folder by batch_extract so reruns skip finished videos
+MANIFEST_NAME = "extraction_manifest.json"
+# Next to the manifest: how far each running segment or target got, so an interrupted video resumes there
+PROGRESS_FOLDER = ".extraction_progress"
+PROGRESS_INTERVAL = 1.0
+
+# Options that change how fast frames are extracted but not which frames are written
+EXECUTION_OPTIONS = ("threads", "encode_threads", "queue_size", "backend")
+
+def sample_index(pos_msec, period_msec):
+    # Index of the sample slot a frame timestamp falls into. The half-millisecond
+    # tolerance absorbs timestamp rounding in the container (e.g. 29.97 fps).
+    return int((pos_msec + 0.5) // period_msec)
+
+def seek_before(cap, pos_msec, lead_msec):
+    """Seek so that grabbing forward passes every frame from pos_msec on.
+
+    OpenCV rounds seeks to whole frames and may land late, so seek lead_msec
+    early and back off further until the grabbed frame lies before pos_msec.
+    Returns False when there is nothing left to grab.
+    """
+    while True:
+        start = max(pos_msec - lead_msec, 0.0)
+        cap.set(cv2.CAP_PROP_POS_MSEC, start)
+        if not cap.grab():
+            return False
+        if start == 0.0 or cap.get(cv2.CAP_PROP_POS_MSEC) + 0.5 < pos_msec:
+            return True
+        lead_msec *= 4
+
+def iter_sampled_frames(cap, sample_rate, sampling="auto", start=0, stop=None):
+    """Yield (index, frame) for the first frame at or after every 1/sample_rate seconds.
+
+    "grab" decodes every frame but only converts the sampled ones, "seek" jumps
+    to each sample timestamp and suits sparse rates, "auto" picks between them.
+    start and stop limit the output to sample indices in [start, stop).
+    """
+    period = 1000.0 / sample_rate
+    if sampling == "auto":
+        sampling = "seek" if period >= SEEK_MIN_PERIOD * 1000 else "grab"
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    lead = 2000.0 / fps if fps > 0 else 1000.0
+
+    if sampling == "seek":
+        target = start
+        while stop is None or target < stop:
+            if not seek_before(cap, target * period, lead):
+                break
+            index = sample_index(cap.get(cv2.CAP_PROP_POS_MSEC), period)
+            while index < target and cap.grab():
+                index = sample_index(cap.get(cv2.CAP_PROP_POS_MSEC), period)
+            if index < target or (stop is not None and index >= stop):
+                break
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            yield index, frame
+            target = index + 1
+    else:
+        last = start - 1
+        grabbed = seek_before(cap, start * period, lead) if start > 0 else cap.grab()
+        while grabbed:
+            index = sample_index(cap.get(cv2.CAP_PROP_POS_MSEC), period)
+            if stop is not None and index >= stop:
+                break
+            if index > last:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                yield index, frame
+                last = index
+            grabbed = cap.grab()
+
+def iter_sampled_frames_av(container, sample_rate, sampling="auto", start=0, stop=None, threads=0):
+    """PyAV counterpart of iter_sampled_frames, with the same sample indices.
+
+    The codec context decodes on `threads` threads (0 lets FFmpeg choose), and
+    "keyframes" sampling skips decoding of everything but I-frames, yielding the
+    first keyframe of every sample slot.
+    """
+    stream = container.streams.video[0]
+    stream.thread_type = "AUTO"
+    stream.codec_context.thread_count = threads
+    if sampling == "keyframes":
+        stream.codec_context.skip_frame = "NONKEY"
+
+    period = 1000.0 / sample_rate
+    if sampling == "auto":
+        sampling = "seek" if period >= SEEK_MIN_PERIOD * 1000 else "grab"
+    time_base = float(stream.time_base)
+    start_pts = stream.start_time or 0
+
+    def decode_from(pos_msec):
+        # Seeking lands on the keyframe at or before pos_msec, decoding goes on from there
+        if pos_msec > 0:
+            container.seek(start_pts + int(pos_msec / 1000 / time_base), stream=stream)
+        for frame in container.decode(stream):
+            if frame.pts is not None:
+                yield sample_index((frame.pts - start_pts) * time_base * 1000, period), frame
+
+    if sampling == "seek":
+        target = start
+        while stop is None or target < stop:
+            index, frame = next(((i, f) for i, f in decode_from(target * period) if i >= target), (None, None))
+            if frame is None or (stop is not None and index >= stop):
+                break
+            yield index, frame.to_ndarray(format="bgr24")
+            target = index + 1
+    else:
+        last = start - 1
+        for index, frame in decode_from(start * period):
+            if stop is not None and index >= stop:
+                break
+            if index > last:
+                yield index, frame.to_ndarray(format="bgr24")
+                last = index
+
+def open_video(video_path, threads=0):
+    # threads > 0 caps the FFmpeg decoder threads where the OpenCV build allows it
+    if threads > 0 and hasattr(cv2, "CAP_PROP_N_THREADS"):
+        return cv2.VideoCapture(video_path, cv2.CAP_ANY, [cv2.CAP_PROP_N_THREADS, threads])
+    return cv2.VideoCapture(video_path)
+
+def _closing(frames, close):
+    try:
+        yield from frames
+    finally:
+        close()
+
+def iter_decoded_frames(cap):
+    """Yield (pos_msec, retrieve) for every frame, retrieve() converts the frame only when called."""
+    def retrieve():
+        return cap.retrieve()[1]
+
+    while cap.grab():
+        yield cap.get(cv2.CAP_PROP_POS_MSEC), retrieve
+
+def iter_decoded_frames_av(container, threads=0, keyframes=False):
+    """PyAV counterpart of iter_decoded_frames, optionally decoding keyframes only."""
+    stream = container.streams.video[0]
+    stream.thread_type = "AUTO"
+    stream.codec_context.thread_count = threads
+    if keyframes:
+        stream.codec_context.skip_frame = "NONKEY"
+    time_base = float(stream.time_base)
+    start_pts = stream.start_time or 0
+    for frame in container.decode(stream):
+        if frame.pts is not None:
+            yield (frame.pts - start_pts) * time_base * 1000, lambda frame=frame: frame.to_ndarray(format="bgr24")
+
+def open_decoded_frames(video_path, threads=0, backend="opencv", keyframes=False):
+    """Open a video and return an iterator of (pos_msec, retrieve) for every decoded frame.
+
+    Falls back to OpenCV like open_sampled_frames, which ignores keyframes.
+    """
+    if backend == "pyav" and av is not None:
+        try:
+            container = av.open(video_path)
+        except av.FFmpegError as e:
+            raise IOError(f"Cannot open video {video_path}") from e
+        if not container.streams.video:
+            container.close()
+            raise IOError(f"No video stream in {video_path}")
+        return _closing(iter_decoded_frames_av(container, threads, keyframes), container.close)
+
+    cap = open_video(video_path, threads)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video {video_path}")
+    return _closing(iter_decoded_frames(cap), cap.release)
+
+def open_sampled_frames(video_path, sample_rate, sampling="auto", start=0, stop=None, threads=0, backend="opencv"):
+    """Open a video with the chosen decoder backend and return an iterator of sampled (index, frame) pairs.
+
+    Raises IOError if the video cannot be opened. The "pyav" backend falls back
+    to OpenCV when PyAV is not installed, and OpenCV treats "keyframes"
+    sampling as "grab" since it cannot skip decoding non-key frames.
+    """
+    if backend == "pyav" and av is not None:
+        try:
+            container = av.open(video_path)
+        except av.FFmpegError as e:
+            raise IOError(f"Cannot open video {video_path}") from e
+        if not container.streams.video:
+            container.close()
+            raise IOError(f"No video stream in {video_path}")
+        frames = iter_sampled_frames_av(container, sample_rate, sampling, start, stop, threads)
+        return _closing(frames, container.close)
+
+    cap = open_video(video_path, threads)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video {video_path}")
+    if sampling == "keyframes":
+        sampling = "grab"
+    return _closing(iter_sampled_frames(cap, sample_rate, sampling, start, stop), cap.release)
+
+def rotate_frame(frame, rotation):
+    if rotation == "Rotate Left 90°":
+        return cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    if rotation == "Rotate Right 90°":
+        return cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+    return frame
+
+def transform_frame(frame, rotation="No Rotation", roi=None, imgsz=None, letterbox=False):
+    """Rotate, crop and resize a frame the way it should be written.
+
+    roi is an (x, y, width, height) crop in rotated frame coordinates, clipped
+    to the frame. imgsz shrinks the long side to that many pixels (frames are
+    never enlarged) and letterbox pads the result to an imgsz square with the
+    gray YOLO uses for padding.
+    """
+    frame = rotate_frame(frame, rotation)
+    if roi is not None:
+        x, y, width, height = roi
+        # Clamp both ends, a negative stop would count from the far edge
+        frame = frame[max(y, 0):max(y + height, 0), max(x, 0):max(x + width, 0)]
+        if frame.size == 0:
+            raise ValueError(f"Crop region {roi} lies outside the frame")
+    if imgsz:
+        height, width = frame.shape[:2]
+        scale = imgsz / max(height, width)
+        if scale < 1:
+            size = (max(round(width * scale), 1), max(round(height * scale), 1))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if letterbox:
+            height, width = frame.shape[:2]
+            top, left = (imgsz - height) // 2, (imgsz - width) // 2
+            frame = cv2.copyMakeBorder(frame, top, imgsz - height - top, left, imgsz - width - left,
+                                       cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return frame
+
+def write_file(frame_path, buffer):
+    # Write under a temporary name and rename, so a frame on disk is always complete
+    temp_path = frame_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(buffer)
+    os.replace(temp_path, frame_path)
+
+def write_pipelined(jobs, encode_threads, queue_size, write_buffer=write_file):
+    """Transform, encode and write (frame_path, frame, transform, encode) jobs on background threads.
+
+    The caller's thread keeps decoding into a bounded frame queue, a pool of
+    encoder threads runs the encoders (which release the GIL) and a single
+    writer thread does the file I/O. Both queues hold at most queue_size items,
+    which bounds memory use. Returns how many frames were written.
+    """
+    frame_queue = queue.Queue(maxsize=queue_size)
+    write_queue = queue.Queue(maxsize=queue_size)
+    errors = []
+
+    def encode():
+        while True:
+            item = frame_queue.get()
+            if item is None:
+                break
+            if errors:
+                continue  # Keep draining so the decoder never blocks
+            frame_path, frame, transform, encode = item
+            try:
+                write_queue.put((frame_path, encode(transform_frame(frame, **transform))))
+            except Exception as e:
+                errors.append(e)
+
+    def write():
+        while True:
+            item = write_queue.get()
+            if item is None:
+                break
+            if errors:
+                continue
+            try:
+                write_buffer(*item)
+            except Exception as e:
+                errors.append(e)
+
+    encoders = [threading.Thread(target=encode, daemon=True) for _ in range(encode_threads)]
+    writer = threading.Thread(target=write, daemon=True)
+    for thread in encoders + [writer]:
+        thread.start()
+
+    written = 0
+    try:
+        for job in jobs:
+            if errors:
+                break
+            frame_queue.put(job)
+            written += 1
+    finally:
+        for _ in encoders:
+            frame_queue.put(None)
+        for thread in encoders:
+            thread.join()
+        write_queue.put(None)
+        writer.join()
+    if errors:
+        raise errors[0]
+    return written
+
+def write_frames(jobs, encode_threads=0, queue_size=16, write_buffer=write_file):
+    """Write (frame_path, frame, transform, encode) jobs and return how many were written.
+
+    transform holds the transform_frame keyword arguments for the frame and
+    encode turns the result into file bytes, see make_encoder. write_buffer
+    stores the bytes under frame_path, by default as a file. With
+    encode_threads > 0 encoding and writing are pipelined behind decoding.
+    """
+    if encode_threads > 0:
+        return write_pipelined(jobs, encode_threads, queue_size, write_buffer)
+
+    written = 0
+    for frame_path, frame, transform, encode in jobs:
+        write_buffer(frame_path, encode(transform_frame(frame, **transform)))
+        written += 1
+    return written
+
+def open_shard_output(output_folders, prefix, shard_mb):
+    """Return (write_buffer, close) that stores frames in tar shards, one shard set per output folder."""
+    writers = {os.path.normpath(folder): shard_writer(folder, prefix, int(shard_mb * 1024 * 1024))
+               for folder in output_folders}
+
+    def write_buffer(frame_path, buffer):
+        write, _ = writers[os.path.normpath(os.path.dirname(frame_path))]
+        write([(os.path.basename(frame_path), buffer)])
+
+    def close():
+        for _, close_writer in writers.values():
+            close_writer()
+    return write_buffer, close
+
+def frame_hash(frame):
+    """64-bit difference hash of a frame, computed on a 9x8 grayscale thumbnail."""
+    small = cv2.cvtColor(cv2.resize(frame, (9, 8), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+    return int.from_bytes(np.packbits(small[:, 1:] > small[:, :-1]).tobytes(), "big")
+
+def drop_near_duplicates(frames, max_distance, counts):
+    """Yield only (index, frame) pairs whose hash differs from the last kept frame by more than max_distance bits.
+
+    Skipped frames are counted in counts["dropped"].
+    """
+    last_hash = None
+    for index, frame in frames:
+        current = frame_hash(frame)
+        if last_hash is not None and bin(current ^ last_hash).count("1") <= max_distance:
+            counts["dropped"] += 1
+            continue
+        last_hash = current
+        yield index, frame
+
+def write_json(path, data):
+    # Write to a temporary file first so a crash never leaves a truncated file behind
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f, indent=1)
+    os.replace(temp_path, path)
+
+def track_progress(progress_path, starts, write_buffer, interval=PROGRESS_INTERVAL):
+    """Return (started, write_buffer) that save how far each slot (a target, or the one segment) got.
+
+    started(slot, index, frame_path) is called from the decoding thread just
+    before a frame is queued, the returned write_buffer wraps the given one.
+    The saved {"next": [index per slot]} is an index below which every sample
+    slot was written, dropped as a near-duplicate or had no frame, so frames
+    that finish out of order are never skipped on resume. It is saved at most
+    every interval seconds.
+    """
+    lock = threading.Lock()
+    pending = {}  # frame path -> (slot, index) queued but not written yet
+    safe = list(starts)
+    saved_at = [time.monotonic()]
+
+    def started(slot, index, frame_path):
+        with lock:
+            safe[slot] = min((i for s, i in pending.values() if s == slot), default=index)
+            pending[frame_path] = (slot, index)
+            if time.monotonic() - saved_at[0] >= interval:
+                saved_at[0] = time.monotonic()
+                write_json(progress_path, {"next": safe})
+
+    def tracked_write(frame_path, buffer):
+        write_buffer(frame_path, buffer)
+        with lock:
+            pending.pop(frame_path, None)
+    return started, tracked_write
+
+def load_progress(progress_path):
+    """Return the saved next index of every slot, or None if there is no progress file."""
+    try:
+        with open(progress_path) as f:
+            return json.load(f)["next"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def extract_frames(video_path, sample_rate, output_folder, rotation, compression, sampling="auto", threads=0,
+                   start=0, stop=None, encode_threads=0, queue_size=16, backend="opencv", dedup_distance=None,
+                   roi=None, imgsz=None, letterbox=False, image_format="jpeg", encoder_options=None, shard_mb=None,
+                   progress_path=None):
+    """Write sampled frames of one video as {base_name}_frame_{k}.jpg (or the image_format's extension).
+
+    start and stop restrict the run to sample indices in [start, stop), so a
+    video can be split into segments that are extracted independently. With
+    encode_threads > 0 encoding and writing are pipelined behind decoding.
+    With dedup_distance set, frames within that many hash bits of the last
+    kept frame are skipped before encoding. roi, imgsz and letterbox crop and
+    resize frames after rotation, see transform_frame. compression is the
+    JPEG/WebP quality, encoder_options holds further make_encoder settings.
+    With shard_mb set the frames go into tar shards of about that size named
+    after the video (and the segment start), see dataset_shards. With
+    progress_path set (loose files only) the progress is saved there for
+    resuming, see track_progress.
+    Returns (frames_written, frames_dropped).
+    """
+    source = open_sampled_frames(video_path, sample_rate, sampling, start, stop, threads, backend)
+    counts = {"dropped": 0}
+    frames = source
+    if dedup_distance is not None:
+        frames = drop_near_duplicates(source, dedup_distance, counts)
+
+    base_name = os.path.splitext(os.path.basename(video_path))[0]
+    os.makedirs(output_folder, exist_ok=True)
+    transform = {"rotation": rotation, "roi": roi, "imgsz": imgsz, "letterbox": letterbox}
+    extension, encode = make_encoder(image_format, compression, **(encoder_options or {}))
+    write_buffer, close_output, started = write_file, None, None
+    if shard_mb:
+        prefix = f"{base_name}_{start}" if start or stop is not None else base_name
+        write_buffer, close_output = open_shard_output([output_folder], prefix, shard_mb)
+    elif progress_path:
+        started, write_buffer = track_progress(progress_path, [start], write_buffer)
+
+    def make_jobs():
+        for index, frame in frames:
+            frame_path = os.path.join(output_folder, frame_stem(base_name, index) + extension)
+            if started is not None:
+                started(0, index, frame_path)
+            yield frame_path, frame, transform, encode
+    jobs = make_jobs()
+
+    try:
+        return write_frames(jobs, encode_threads, queue_size, write_buffer), counts["dropped"]
+    finally:
+        source.close()
+        if close_output is not None:
+            close_output()
+
+def load_job_spec(spec_path):
+    """Read a JSON job spec of output targets and fill in defaults.
+
+    The spec looks like {"targets": [{"sample_rate": 1, "output_folder": "labeling",
+    "rotation": "No Rotation", "compression": 90, "image_format": "jpeg",
+    "roi": [x, y, w, h], "imgsz": 640, "letterbox": false}, ...]}; everything
+    but sample_rate and output_folder is optional.
+    """
+    with open(spec_path) as f:
+        spec = json.load(f)
+    targets = []
+    for i, target in enumerate(spec.get("targets", [])):
+        if "sample_rate" not in target or "output_folder" not in target:
+            raise ValueError(f"Target {i + 1} needs a sample_rate and an output_folder")
+        if float(target["sample_rate"]) <= 0:
+            raise ValueError(f"Target {i + 1} has a non-positive sample_rate")
+        targets.append({
+            "sample_rate": float(target["sample_rate"]),
+            "output_folder": target["output_folder"],
+            "rotation": target.get("rotation", "No Rotation"),
+            "compression": int(target.get("compression", 90)),
+        })
+        for key in ("roi", "imgsz", "letterbox", "image_format"):
+            if key in target:
+                targets[-1][key] = tuple(target[key]) if key == "roi" else target[key]
+    if not targets:
+        raise ValueError(f"No targets in job spec {spec_path}")
+    return targets
+
+def resolve_targets(targets, base_folder):
+    """Return a copy of targets with relative output folders placed under base_folder."""
+    return [dict(target, output_folder=os.path.join(base_folder, target["output_folder"])) for target in targets]
+
+def save_profile(profile_path, options):
+    """Save batch_extract keyword options (sample rate, targets, workers, ...) as a JSON parameter profile."""
+    with open(profile_path, "w") as f:
+        json.dump({"profile": options}, f, indent=1)
+
+def load_profile(profile_path):
+    """Read a parameter profile written by save_profile back into batch_extract keyword options."""
+    with open(profile_path) as f:
+        options = json.load(f).get("profile")
+    if not isinstance(options, dict):
+        raise ValueError(f"No profile in {profile_path}")
+    if not options.get("sample_rate") and not options.get("targets"):
+        raise ValueError(f"Profile {profile_path} needs a sample_rate or targets")
+    if options.get("roi"):
+        options["roi"] = tuple(options["roi"])
+    for target in options.get("targets") or []:
+        if "roi" in target:
+            target["roi"] = tuple(target["roi"])
+    return options
+
+def extract_targets(video_path, targets, sampling="grab", threads=0, encode_threads=0, queue_size=16,
+                    backend="opencv", dedup_distance=None, roi=None, imgsz=None, letterbox=False,
+                    image_format="jpeg", encoder_options=None, shard_mb=None, progress_path=None):
+    """Serve several output targets (sample rate, rotation, compression, output folder) from one decoding pass.
+
+    Every decoded frame is converted once and routed to each target whose next
+    sample slot it opens. Only "keyframes" sampling changes how the video is
+    decoded, any other mode decodes every frame. With dedup_distance set, each
+    target skips frames close to the last frame it kept. roi, imgsz, letterbox
+    and image_format apply to targets that don't set their own. A target's
+    optional "start" skips its sample indices below it, used to resume. With
+    shard_mb set every target folder gets tar shards instead of loose files,
+    otherwise progress_path can record each target's progress like extract_frames.
+    Returns (frames_written, frames_dropped) summed over all targets.
+    """
+    decoded = open_decoded_frames(video_path, threads, backend, keyframes=sampling == "keyframes")
+
+    base_name = os.path.splitext(os.path.basename(video_path))[0]
+    periods = [1000.0 / target["sample_rate"] for target in targets]
+    last_index = [target.get("start", 0) - 1 for target in targets]
+    last_hash = [None] * len(targets)
+    counts = {"dropped": 0}
+    transforms = [{"rotation": target["rotation"], "roi": target.get("roi", roi),
+                   "imgsz": target.get("imgsz", imgsz), "letterbox": target.get("letterbox", letterbox)}
+                  for target in targets]
+    encoders = [make_encoder(target.get("image_format", image_format), target["compression"],
+                             **(encoder_options or {}))
+                for target in targets]
+    for target in targets:
+        os.makedirs(target["output_folder"], exist_ok=True)
+
+    def route():
+        for pos_msec, retrieve in decoded:
+            wanted = []
+            for i, period in enumerate(periods):
+                index = sample_index(pos_msec, period)
+                if index > last_index[i]:
+                    last_index[i] = index
+                    wanted.append((i, index))
+            if not wanted:
+                continue
+            frame = retrieve()
+            if frame is None:
+                break
+            current = frame_hash(frame) if dedup_distance is not None else None
+            for i, index in wanted:
+                if current is not None:
+                    if last_hash[i] is not None and bin(current ^ last_hash[i]).count("1") <= dedup_distance:
+                        counts["dropped"] += 1
+                        continue
+                    last_hash[i] = current
+                target = targets[i]
+                extension, encode = encoders[i]
+                frame_path = os.path.join(target["output_folder"], frame_stem(base_name, index) + extension)
+                if started is not None:
+                    started(i, index, frame_path)
+                yield frame_path, frame, transforms[i], encode
+
+    write_buffer, close_output, started = write_file, None, None
+    if shard_mb:
+        write_buffer, close_output = open_shard_output([target["output_folder"] for target in targets],
+                                                       base_name, shard_mb)
+    elif progress_path:
+        started, write_buffer = track_progress(progress_path, [target.get("start", 0) for target in targets],
+                                               write_buffer)
+
+    try:
+        return write_frames(route(), encode_threads, queue_size, write_buffer), counts["dropped"]
+    finally:
+        decoded.close()
+        if close_output is not None:
+            close_output()
+
+def plan_segments(video_path, sample_rate, segments):
+    """Split a video into up to `segments` (start, stop) ranges of sample indices.
+
+    Ranges start on sample slot boundaries, so extracting them separately names
+    frames exactly like a single sequential run. The last range is open-ended
+    because container durations are only estimates.
+    """
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    cap.release()
+    if segments <= 1 or fps <= 0 or frame_count <= 0:
+        return [(0, None)]
+
+    total_slots = int(frame_count / fps * sample_rate) + 1
+    bounds = sorted({total_slots * i // segments for i in range(segments)})
+    return list(zip(bounds, bounds[1:] + [None]))
+
+def find_videos(folder_path, recursive=False):
+    """Return the video files in folder_path, largest first so a worker pool stays busy."""
+    if recursive:
+        video_paths = [os.path.join(dirpath, f)
+                       for dirpath, _, filenames in os.walk(folder_path)
+                       for f in filenames if f.endswith(VIDEO_EXTENSIONS)]
+    else:
+        video_paths = [os.path.join(folder_path, f) for f in os.listdir(folder_path)
+                       if f.endswith(VIDEO_EXTENSIONS)]
+    video_paths.sort(key=os.path.getsize, reverse=True)
+    return video_paths
+
+def _init_worker(threads):
+    # Each worker decodes its own video, so keep OpenCV from spawning a thread per core on top
+    cv2.setNumThreads(threads)
+
+def load_manifest(manifest_path):
+    """Read a batch manifest, {video path: entry}, or return an empty one if there is none yet."""
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)["videos"]
+    except FileNotFoundError:
+        return {}
+
+def save_manifest(manifest_path, manifest):
+    write_json(manifest_path, {"version": 1, "videos": manifest})
+
+def progress_folder(manifest_path):
+    return os.path.join(os.path.dirname(manifest_path), PROGRESS_FOLDER)
+
+def progress_prefix(video_path):
+    return hashlib.md5(os.path.abspath(video_path).encode("utf-8")).hexdigest()[:16] + "_"
+
+def progress_path(folder, video_path, part):
+    """Return the progress file of one segment (by its first sample index) or of the targets of a video."""
+    return os.path.join(folder, f"{progress_prefix(video_path)}{part}.json")
+
+def clear_progress(folder, video_path):
+    # Every progress file of the video, whatever segments an earlier run used
+    prefix = progress_prefix(video_path)
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefix):
+                    os.remove(entry.path)
+    except FileNotFoundError:
+        pass
+
+def video_signature(video_path):
+    stat = os.stat(video_path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+def written_indices(output_folder, extension, listings):
+    """Return {base_name: set of sample indices} of the frames already in output_folder.
+
+    listings caches the result per (folder, extension) so each folder is only listed once.
+    """
+    key = (output_folder, extension)
+    if key not in listings:
+        indices = {}
+        if os.path.isdir(output_folder):
+            for entry in os.scandir(output_folder):
+                name, ext = os.path.splitext(entry.name)
+                base_name, sep, index = name.rpartition(FRAME_SEPARATOR)
+                if ext == extension and sep and index.isdigit():
+                    indices.setdefault(base_name, set()).add(int(index))
+        listings[key] = indices
+    return listings[key]
+
+def resume_point(saved, start, stop, indices):
+    """Return (new_start, kept) for resuming the sample range [start, stop) from its saved next index.
+
+    The saved index comes from the progress file (see track_progress), so gaps
+    from sampling or dropped near-duplicates don't stop the resume early. kept
+    counts the frames on disk below it; frames after it are written again.
+    """
+    new_start = max(start, saved) if saved is not None else start
+    if stop is not None:
+        new_start = min(new_start, stop)
+    return new_start, sum(start <= index < new_start for index in indices)
+
+def make_job(sample_rate=None, output_folder=None, rotation="No Rotation", compression=90, targets=None):
+    """Return the per-video extraction function batch_extract runs, taking (video_path, **options)."""
+    if targets:
+        return partial(extract_targets, targets=targets)
+    return partial(extract_frames, sample_rate=sample_rate, output_folder=output_folder,
+                   rotation=rotation, compression=compression)
+
+def extraction_params(sample_rate, rotation, compression, targets, options):
+    """Return the settings that decide which frames are written, in the form they are stored in a manifest."""
+    return json.loads(json.dumps({
+        "sample_rate": sample_rate, "rotation": rotation, "compression": compression, "targets": targets,
+        **{key: value for key, value in options.items() if key not in EXECUTION_OPTIONS}}))
+
+def plan_video(video_path, manifest, params, sample_rate=None, output_folder=None, segments=1, targets=None,
+               options=None, listings=None, progress=None):
+    """Return (calls, kept) for one video, or None if the manifest says it is already done.
+
+    calls holds the job keyword arguments for each segment (including the
+    output folder or targets, which may differ per video) and kept the frames
+    an interrupted run already wrote. manifest may be None; otherwise the
+    video's entry is (re)started and must be saved by the caller. progress is
+    the folder of the progress files (see progress_folder): an interrupted
+    video resumes where they say, and the jobs keep them up to date. Shard
+    output has no progress and starts over.
+    """
+    options = options or {}
+    listings = {} if listings is None else listings
+    resume = False
+    if manifest is not None:
+        key = os.path.abspath(video_path)
+        signature = video_signature(video_path)
+        entry = manifest.get(key)
+        if entry and entry["size"] == signature["size"] and entry["mtime"] == signature["mtime"] \
+                and entry["params"] == params:
+            if entry["complete"]:
+                return None
+            resume = True
+        manifest[key] = dict(signature, params=params, complete=False, frames_written=0)
+    if options.get("shard_mb"):
+        progress = None
+    if progress is not None and not resume:
+        clear_progress(progress, video_path)  # Left by a run with other settings or of an older file
+    resume = resume and progress is not None
+
+    base_name = os.path.splitext(os.path.basename(video_path))[0]
+    default_format = options.get("image_format", "jpeg")
+    calls, kept = [], 0
+    if targets:
+        path = progress_path(progress, video_path, "targets") if progress is not None else None
+        saved = (load_progress(path) if resume else None) or []
+        resumed_targets = []
+        for i, target in enumerate(targets):
+            start = 0
+            if i < len(saved):
+                extension = EXTENSIONS[target.get("image_format", default_format)]
+                indices = written_indices(target["output_folder"], extension, listings).get(base_name, ())
+                start, target_kept = resume_point(saved[i], 0, None, indices)
+                kept += target_kept
+            resumed_targets.append(dict(target, start=start))
+        calls.append({"targets": resumed_targets, "progress_path": path})
+    else:
+        ranges = plan_segments(video_path, sample_rate, segments) if segments > 1 else [(0, None)]
+        indices = written_indices(output_folder, EXTENSIONS[default_format], listings).get(base_name, ()) \
+            if resume else ()
+        for start, stop in ranges:
+            path = progress_path(progress, video_path, start) if progress is not None else None
+            saved = (load_progress(path) if resume else None) or [None]
+            new_start, range_kept = resume_point(saved[0], start, stop, indices)
+            kept += range_kept
+            segment = {"start": new_start, "stop": stop} if len(ranges) > 1 or new_start > 0 else {}
+            calls.append(dict(segment, output_folder=output_folder, progress_path=path))
+    return calls, kept
+
+def video_outputs(video_path, output_folder, targets, split, shards=False):
+    """Return (output_folder, targets, subset) for one video.
+
+    With split = (train_ratio, valid_ratio) the whole video goes to one subset,
+    chosen by assign_subset from video_group of its frames' stems (the key the
+    dataset split's "by source video" assignment uses), and its frames are written to
+    <output_folder>/<subset>/images (or <target folder>/<subset>/images), so
+    frames of one clip never end up in two subsets. Shards go straight into
+    the subset folder, like the dataset split tool writes them.
+    """
+    if not split:
+        return output_folder, targets, None
+    base_name = os.path.splitext(os.path.basename(video_path))[0]
+    subset = assign_subset(video_group(frame_stem(base_name, 0)), *split)
+    folder = subset if shards else os.path.join(subset, "images")
+    if targets:
+        targets = [dict(target, output_folder=os.path.join(target["output_folder"], folder)) for target in targets]
+        return output_folder, targets, subset
+    return os.path.join(output_folder, folder), targets, subset
+
+def record_video(manifest, manifest_path, video_path, written, error):
+    """Mark a video as finished (or failed) in the manifest and save it; a finished video's progress files go."""
+    entry = manifest[os.path.abspath(video_path)]
+    entry["frames_written"] = written
+    entry["complete"] = error is None
+    save_manifest(manifest_path, manifest)
+    if error is None:
+        clear_progress(progress_folder(manifest_path), video_path)
+
+def batch_extract(video_paths, sample_rate=None, output_folder=None, rotation="No Rotation", compression=90,
+                  workers=1, threads_per_worker=1, segments=1, targets=None, manifest_path=None, split=None,
+                  planned=None, **options):
+    """Extract frames from several videos, yielding (video_path, written, dropped, error) as each finishes.
+
+    With workers > 1 the videos are spread over a process pool in the given order,
+    and with segments > 1 each video is also split into time ranges decoded by
+    separate workers. Otherwise they are processed one after another in this process.
+    When targets is given, every video is fanned out to those targets with
+    extract_targets instead and is never split into segments.
+    Other keyword options (sampling, backend, dedup_distance, ...) are passed on
+    to extract_frames. Near-duplicate detection restarts at every segment.
+
+    With manifest_path set, each video's size, mtime, the extraction parameters
+    and the frames written are recorded there. Videos that are unchanged since
+    a completed run with the same parameters are skipped (and not yielded),
+    and a video that was interrupted resumes where its progress file says
+    (see plan_video).
+    written then counts the frames kept from the interrupted run as well.
+    planned(count) is called once, before the first video starts, with the
+    number of videos that will be yielded.
+
+    With split = (train_ratio, valid_ratio) each video is assigned to train,
+    valid or test as a whole and extracted straight into that subset's images
+    folder, see video_outputs.
+    """
+    job = make_job(sample_rate, output_folder, rotation, compression, targets)
+    if targets:
+        segments = 1
+
+    manifest = load_manifest(manifest_path) if manifest_path else None
+    params = extraction_params(sample_rate, rotation, compression, targets, dict(options, split=split))
+    listings = {}
+    plans = []
+    for video_path in video_paths:
+        video_output, video_targets, subset = video_outputs(video_path, output_folder, targets, split,
+                                                            bool(options.get("shard_mb")))
+        plan = plan_video(video_path, manifest, dict(params, subset=subset), sample_rate, video_output, segments,
+                          video_targets, options, listings, progress_folder(manifest_path) if manifest_path else None)
+        if plan is not None:
+            plans.append((video_path,) + plan)
+    if manifest is not None:
+        save_manifest(manifest_path, manifest)
+    if planned is not None:
+        planned(len(plans))
+
+    def finish(video_path, written, dropped, error):
+        if manifest is not None:
+            record_video(manifest, manifest_path, video_path, written, error)
+        return video_path, written, dropped, error
+
+    if workers <= 1:
+        for video_path, calls, kept in plans:
+            written, dropped, error = kept, 0, None
+            try:
+                for call in calls:
+                    call_written, call_dropped = job(video_path, **call, **options)
+                    written += call_written
+                    dropped += call_dropped
+            except Exception as e:
+                error = e
+            yield finish(video_path, written, dropped, error)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(threads_per_worker,)) as pool:
+        futures = {}
+        pending = {}
+        for video_path, calls, kept in plans:
+            pending[video_path] = [len(calls), kept, 0, None]
+            for call in calls:
+                future = pool.submit(job, video_path, threads=threads_per_worker, **call, **options)
+                futures[future] = video_path
+
+        for future in as_completed(futures):
+            video_path = futures[future]
+            state = pending[video_path]
+            state[0] -= 1
+            try:
+                written, dropped = future.result()
+                state[1] += written
+                state[2] += dropped
+            except Exception as e:
+                state[3] = e
+            if state[0] == 0:
+                yield finish(video_path, state[1], state[2], state[3])
@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import filedialog, ttk
-import cv2
 import os
 from tkinterdnd2 import TkinterDnD, DND_FILES
+from dataset_shards import DEFAULT_SHARD_MB
+from frame_extraction import find_videos, batch_extract, load_job_spec, resolve_targets, save_profile, MANIFEST_NAME
 
 # Default directory
 default_dir = "/home/chucklab/Data/"
+no_job_spec_text = "No job spec loaded (single output from the settings below)"
 
 def select_file():
     file_path = filedialog.askopenfilename(initialdir=default_dir)
@@ -17,6 +19,14 @@ def select_folder():
     if folder_path:
         folder_label.config(text=folder_path)
 
+def select_job_spec():
+    spec_path = filedialog.askopenfilename(initialdir=default_dir, filetypes=[("Job spec", "*.json")])
+    if spec_path:
+        job_spec_label.config(text=spec_path)
+
+def clear_job_spec():
+    job_spec_label.config(text=no_job_spec_text)
+
 def drop_file(event):
     file_label.config(text=event.data)
     file_label.config(bg="white")  # Revert background color after drop
@@ -31,151 +41,456 @@ def on_drag_enter(event, label):
 def on_drag_leave(event, label):
     label.config(bg="white")  # Revert background color when dragging leaves the label
 
-def extract_frames(video_path, sample_rate, output_folder, rotation, compression):
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        status_label.config(text=f"Error: Cannot open video {video_path}")
-        return
-
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    interval = int(fps / sample_rate)
-
-    base_name = os.path.splitext(os.path.basename(video_path))[0]
-    os.makedirs(output_folder, exist_ok=True)
-
-    count = 0
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        if count % interval == 0:
-            if rotation == "Rotate Left 90°":
-                frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
-            elif rotation == "Rotate Right 90°":
-                frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-            frame_name = f"{base_name}_frame_{count // interval}.jpg"
-            frame_path = os.path.join(output_folder, frame_name)
-            cv2.imwrite(frame_path, frame, [int(cv2.IMWRITE_JPEG_QUALITY), compression])  # Apply compression
-        count += 1
-    cap.release()
+def parse_positive_float(value):
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return number if number > 0 else None
+
+def parse_positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        return None
+    return number if number > 0 else None
+
+def parse_non_negative_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        return None
+    return number if number >= 0 else None
+
+def parse_roi(value):
+    # "x,y,w,h" in pixels of the rotated frame, blank means no crop
+    if not value.strip():
+        return ()
+    try:
+        roi = tuple(int(v) for v in value.split(","))
+    except ValueError:
+        return None
+    if len(roi) != 4 or roi[2] <= 0 or roi[3] <= 0:
+        return None
+    return roi
+
+def read_options():
+    """Collect the extraction settings from the GUI, or report the first invalid one and return None."""
+    sample_rate = parse_positive_float(sample_rate_entry.get())
+    workers = parse_positive_int(workers_entry.get())
+    segments = parse_positive_int(segments_entry.get())
+    encode_threads = parse_non_negative_int(encode_threads_entry.get())
+    queue_size = parse_positive_int(queue_size_entry.get())
+    dedup_distance = parse_non_negative_int(dedup_distance_entry.get())
+    imgsz = parse_positive_int(imgsz_entry.get()) if imgsz_entry.get().strip() else 0
+    shard_mb = parse_positive_float(shard_entry.get()) if shard_var.get() else 0
+    split = None
+    if split_var.get():
+        try:
+            split = (float(train_ratio_entry.get()), float(valid_ratio_entry.get()))
+        except ValueError:
+            split = ()
+    roi = parse_roi(roi_entry.get())
+
+    targets = None
+    if job_spec_label.cget("text") != no_job_spec_text:
+        try:
+            targets = load_job_spec(job_spec_label.cget("text"))
+        except (OSError, ValueError) as e:
+            status_label.config(text=f"Error in job spec: {e}")
+            return None
+
+    if sample_rate is None and targets is None:
+        status_label.config(text="Please enter a valid positive number for the sample rate.")
+        return None
+    if workers is None or segments is None:
+        status_label.config(text="Please enter valid positive integers for workers and segments.")
+        return None
+    if encode_threads is None or queue_size is None:
+        status_label.config(text="Please enter valid integers for encoder threads and queue depth.")
+        return None
+    if dedup_var.get() and dedup_distance is None:
+        status_label.config(text="Please enter a valid non-negative integer for the duplicate distance.")
+        return None
+    if imgsz is None:
+        status_label.config(text="Please enter a positive integer for the resize size, or leave it blank.")
+        return None
+    if letterbox_var.get() and not imgsz:
+        status_label.config(text="Letterboxing needs a resize size.")
+        return None
+    if roi is None:
+        status_label.config(text="Please enter the crop region as x,y,w,h, or leave it blank.")
+        return None
+    if shard_mb is None:
+        status_label.config(text="Please enter a positive shard size in MB.")
+        return None
+    if split is not None and (len(split) != 2 or min(split) < 0 or sum(split) > 1):
+        status_label.config(text="Please enter train and valid ratios between 0 and 1 that add up to at most 1.")
+        return None
+
+    return {
+        "sample_rate": sample_rate,
+        "rotation": rotation_var.get(),
+        "compression": compression_slider.get(),
+        "workers": workers,
+        "segments": segments,
+        "sampling": sampling_var.get().lower(),
+        "backend": backend_var.get().lower(),
+        "encode_threads": encode_threads,
+        "queue_size": queue_size,
+        "dedup_distance": dedup_distance if dedup_var.get() else None,
+        "targets": targets,
+        "roi": roi or None,
+        "imgsz": imgsz or None,
+        "letterbox": letterbox_var.get(),
+        "image_format": format_var.get().lower(),
+        "encoder_options": {
+            "png_compression": png_level_slider.get(),
+            "subsampling": subsampling_var.get().replace(":", "") if subsampling_var.get() != "Default" else None,
+            "optimize": optimize_var.get(),
+        },
+        "shard_mb": shard_mb or None,
+        "split": split,
+    }
+
+def summarize(written, dropped):
+    if dropped:
+        return f"{written} frames written, {dropped} near-duplicates skipped."
+    return f"{written} frames written."
 
 def batch_process():
     folder_path = folder_label.cget("text")
-    sample_rate = sample_rate_entry.get()
-    rotation = rotation_var.get()
-    compression = compression_slider.get()
-
-    if not sample_rate.isdigit() or int(sample_rate) <= 0:
-        status_label.config(text="Please enter a valid positive integer for the sample rate.")
+    options = read_options()
+    if options is None:
         return
 
-    sample_rate = int(sample_rate)
     output_folder = os.path.join(folder_path, "output")
-    video_files = [f for f in os.listdir(folder_path) if f.endswith((".mp4", ".avi", ".mkv", ".mov", ".flv", ".wmv", ".mpeg", ".mpg", ".3gp"))]
-
-    for i, video_file in enumerate(video_files):
-        status_label.config(text=f"Processing {video_file} ({i+1}/{len(video_files)})...")
+    manifest_folder = output_folder
+    if options["targets"]:
+        options["targets"] = resolve_targets(options["targets"], folder_path)
+        manifest_folder = folder_path  # Job spec targets may write to several folders
+    manifest_path = os.path.join(manifest_folder, MANIFEST_NAME) if resume_var.get() else None
+    video_files = find_videos(folder_path, recursive=recursive_var.get())
+
+    status_label.config(text=f"Processing {len(video_files)} videos with {options['workers']} workers...")
+    root.update_idletasks()  # Update the GUI to reflect changes
+    failed = []
+    total_written = total_dropped = processed = 0
+    to_process = [len(video_files)]  # Videos the manifest doesn't skip, set once batch_extract has planned
+
+    def planned(count):
+        to_process[0] = count
+
+    for video_path, written, dropped, error in batch_extract(video_files, output_folder=output_folder,
+                                                            manifest_path=manifest_path, planned=planned, **options):
+        processed += 1
+        total_written += written
+        total_dropped += dropped
+        if error is not None:
+            failed.append(f"{os.path.basename(video_path)}: {error}")
+            status_label.config(text=f"Error in {failed[-1]} ({processed}/{to_process[0]})...")
+        else:
+            status_label.config(text=f"Finished {os.path.basename(video_path)} ({processed}/{to_process[0]})...")
         root.update_idletasks()  # Update the GUI to reflect changes
-        video_path = os.path.join(folder_path, video_file)
-        extract_frames(video_path, sample_rate, output_folder, rotation, compression)
-    status_label.config(text="Batch processing completed.")
+    summary = summarize(total_written, total_dropped)
+    if processed < len(video_files):
+        summary += f" {len(video_files) - processed} unchanged videos skipped."
+    if failed:
+        status_label.config(text=f"Batch processing completed, {len(failed)} videos failed:\n" + "\n".join(failed)
+                            + f"\n{summary}")
+    else:
+        status_label.config(text=f"Batch processing completed. {summary}")
 
 def process_video():
     file_path = file_label.cget("text")
-    sample_rate = sample_rate_entry.get()
-    rotation = rotation_var.get()
-    compression = compression_slider.get()
-
-    if not sample_rate.isdigit() or int(sample_rate) <= 0:
-        status_label.config(text="Please enter a valid positive integer for the sample rate.")
+    options = read_options()
+    if options is None:
         return
 
-    sample_rate = int(sample_rate)
     base_name = os.path.splitext(os.path.basename(file_path))[0]
     output_folder = os.path.join(os.path.dirname(file_path), f"{base_name}_frames")
+    if options["targets"]:
+        options["targets"] = resolve_targets(options["targets"], os.path.dirname(file_path))
     status_label.config(text="Processing video...")
     root.update_idletasks()  # Update the GUI to reflect changes
-    extract_frames(file_path, sample_rate, output_folder, rotation, compression)
-    status_label.config(text="Video processing completed.")
+    # A single video only keeps several workers busy when it is split into segments
+    options["workers"] = min(options["workers"], options["segments"])
+    for _, written, dropped, error in batch_extract([file_path], output_folder=output_folder, **options):
+        if error is not None:
+            status_label.config(text=f"Error: {error}")
+            return
+        status_label.config(text=f"Video processing completed. {summarize(written, dropped)}")
+
+def save_settings_profile():
+    options = read_options()
+    if options is None:
+        return
+    profile_path = filedialog.asksaveasfilename(initialdir=default_dir, defaultextension=".json",
+                                                filetypes=[("Parameter profile", "*.json")])
+    if not profile_path:
+        return
+    save_profile(profile_path, options)
+    status_label.config(text=f"Profile saved to {profile_path}. Use it with watch-folder.py.")
+
+# Only build the GUI when run directly, worker processes import this module too
+if __name__ == "__main__":
+    root = TkinterDnD.Tk()
+    root.title("Video Frame Extractor")
+    root.geometry("400x2000")
+    root.configure(padx=10, pady=10)
+
+    # File Selection Frame
+    file_frame = tk.Frame(root)
+    file_frame.pack(fill="x", pady=5)
+
+    file_label = tk.Label(file_frame, text="Drag a video file here or click to select", anchor="w", bg="white", relief="solid")
+    file_label.pack(fill="x", ipady=10)
+    file_label.drop_target_register(DND_FILES)
+    file_label.dnd_bind('<<Drop>>', drop_file)
+    file_label.dnd_bind('<<DragEnter>>', lambda event: on_drag_enter(event, file_label))
+    file_label.dnd_bind('<<DragLeave>>', lambda event: on_drag_leave(event, file_label))
+
+    file_button = tk.Button(file_frame, text="Select Video File", command=select_file)
+    file_button.pack(pady=5)
+
+    # Folder Selection Frame
+    folder_frame = tk.Frame(root)
+    folder_frame.pack(fill="x", pady=5)
+
+    folder_label = tk.Label(folder_frame, text="Drag a folder here or click to select", anchor="w", bg="white", relief="solid")
+    folder_label.pack(fill="x", ipady=10)
+    folder_label.drop_target_register(DND_FILES)
+    folder_label.dnd_bind('<<Drop>>', drop_folder)
+    folder_label.dnd_bind('<<DragEnter>>', lambda event: on_drag_enter(event, folder_label))
+    folder_label.dnd_bind('<<DragLeave>>', lambda event: on_drag_leave(event, folder_label))
+
+    folder_button = tk.Button(folder_frame, text="Select Folder for Batch Processing", command=select_folder)
+    folder_button.pack(pady=5)
+
+    # Job Spec Frame
+    job_spec_frame = tk.Frame(root)
+    job_spec_frame.pack(fill="x", pady=5)
+
+    job_spec_label = tk.Label(job_spec_frame, text=no_job_spec_text, anchor="w", bg="white", relief="solid")
+    job_spec_label.pack(fill="x", ipady=5)
+
+    job_spec_button = tk.Button(job_spec_frame, text="Load Job Spec (several outputs in one pass)", command=select_job_spec)
+    job_spec_button.pack(side=tk.LEFT, pady=5)
+
+    job_spec_clear_button = tk.Button(job_spec_frame, text="Clear", command=clear_job_spec)
+    job_spec_clear_button.pack(side=tk.LEFT, padx=5, pady=5)
+
+    # Sample Rate Frame
+    sample_rate_frame = tk.Frame(root)
+    sample_rate_frame.pack(fill="x", pady=5)
+
+    sample_rate_label = tk.Label(sample_rate_frame, text="Enter Sample Rate (fps):", anchor="w")
+    sample_rate_label.pack(fill="x")
+
+    sample_rate_entry = tk.Entry(sample_rate_frame)
+    sample_rate_entry.pack(fill="x", pady=5)
+
+    # Rotation Option Frame
+    rotation_frame = tk.Frame(root)
+    rotation_frame.pack(fill="x", pady=5)
+
+    rotation_label = tk.Label(rotation_frame, text="Select Rotation:", anchor="w")
+    rotation_label.pack(fill="x")
+
+    rotation_var = tk.StringVar(value="No Rotation")
+    rotation_options = ["No Rotation", "Rotate Left 90°", "Rotate Right 90°"]
+    rotation_menu = tk.OptionMenu(rotation_frame, rotation_var, *rotation_options)
+    rotation_menu.pack(fill="x", pady=5)
+
+    # Sampling Mode Frame
+    sampling_frame = tk.Frame(root)
+    sampling_frame.pack(fill="x", pady=5)
+
+    sampling_label = tk.Label(sampling_frame, text="Sampling Mode:", anchor="w")
+    sampling_label.pack(fill="x")
+
+    sampling_var = tk.StringVar(value="Auto")
+    sampling_options = ["Auto", "Grab", "Seek", "Keyframes"]
+    sampling_menu = tk.OptionMenu(sampling_frame, sampling_var, *sampling_options)
+    sampling_menu.pack(fill="x", pady=5)
+
+    # Decoder Backend Frame
+    backend_frame = tk.Frame(root)
+    backend_frame.pack(fill="x", pady=5)
+
+    backend_label = tk.Label(backend_frame, text="Decoder Backend (PyAV falls back to OpenCV if not installed):", anchor="w")
+    backend_label.pack(fill="x")
+
+    backend_var = tk.StringVar(value="OpenCV")
+    backend_options = ["OpenCV", "PyAV"]
+    backend_menu = tk.OptionMenu(backend_frame, backend_var, *backend_options)
+    backend_menu.pack(fill="x", pady=5)
+
+    # Compression Slider Frame
+    compression_frame = tk.Frame(root)
+    compression_frame.pack(fill="x", pady=5)
+
+    compression_label = tk.Label(compression_frame, text="JPEG/WebP Quality (0-100):", anchor="w")
+    compression_label.pack(fill="x")
+
+    compression_slider = tk.Scale(compression_frame, from_=0, to=100, orient="horizontal", tickinterval=10)
+    compression_slider.set(90)  # Default value for high quality
+    compression_slider.pack(fill="x", pady=5)
+
+    # Output Format Frame
+    format_frame = tk.Frame(root)
+    format_frame.pack(fill="x", pady=5)
+
+    format_label = tk.Label(format_frame, text="Output Format (TurboJPEG falls back to JPEG if not installed):", anchor="w")
+    format_label.pack(fill="x")
+
+    format_var = tk.StringVar(value="JPEG")
+    format_options = ["JPEG", "TurboJPEG", "WebP", "PNG"]
+    format_menu = tk.OptionMenu(format_frame, format_var, *format_options)
+    format_menu.pack(fill="x", pady=5)
+
+    subsampling_label = tk.Label(format_frame, text="JPEG Chroma Subsampling:", anchor="w")
+    subsampling_label.pack(fill="x")
+
+    subsampling_var = tk.StringVar(value="Default")
+    subsampling_options = ["Default", "4:4:4", "4:2:2", "4:2:0", "4:1:1"]
+    subsampling_menu = tk.OptionMenu(format_frame, subsampling_var, *subsampling_options)
+    subsampling_menu.pack(fill="x", pady=5)
+
+    optimize_var = tk.BooleanVar(value=False)
+    optimize_check = tk.Checkbutton(format_frame, text="Optimize JPEG Huffman tables (smaller, slower)", variable=optimize_var, anchor="w")
+    optimize_check.pack(fill="x")
+
+    png_level_label = tk.Label(format_frame, text="PNG Compression Level (0-9):", anchor="w")
+    png_level_label.pack(fill="x")
+
+    png_level_slider = tk.Scale(format_frame, from_=0, to=9, orient="horizontal", tickinterval=1)
+    png_level_slider.set(3)  # OpenCV's default
+    png_level_slider.pack(fill="x", pady=5)
+
+    shard_var = tk.BooleanVar(value=False)
+    shard_check = tk.Checkbutton(format_frame, text="Write tar shards instead of loose files", variable=shard_var, anchor="w")
+    shard_check.pack(fill="x")
+
+    shard_label = tk.Label(format_frame, text="Shard Size (MB):", anchor="w")
+    shard_label.pack(fill="x")
+
+    shard_entry = tk.Entry(format_frame)
+    shard_entry.insert(0, str(DEFAULT_SHARD_MB))
+    shard_entry.pack(fill="x", pady=5)
+
+    # Resize and Crop Frame
+    resize_frame = tk.Frame(root)
+    resize_frame.pack(fill="x", pady=5)
+
+    imgsz_label = tk.Label(resize_frame, text="Resize Long Side to (px, blank = keep size):", anchor="w")
+    imgsz_label.pack(fill="x")
+
+    imgsz_entry = tk.Entry(resize_frame)
+    imgsz_entry.pack(fill="x", pady=5)
+
+    letterbox_var = tk.BooleanVar(value=False)
+    letterbox_check = tk.Checkbutton(resize_frame, text="Letterbox to a square of that size", variable=letterbox_var, anchor="w")
+    letterbox_check.pack(fill="x")
+
+    roi_label = tk.Label(resize_frame, text="Crop Region x,y,w,h after rotation (blank = full frame):", anchor="w")
+    roi_label.pack(fill="x")
+
+    roi_entry = tk.Entry(resize_frame)
+    roi_entry.pack(fill="x", pady=5)
+
+    # Duplicate Suppression Frame
+    dedup_frame = tk.Frame(root)
+    dedup_frame.pack(fill="x", pady=5)
+
+    dedup_var = tk.BooleanVar(value=False)
+    dedup_check = tk.Checkbutton(dedup_frame, text="Skip near-duplicate frames", variable=dedup_var, anchor="w")
+    dedup_check.pack(fill="x")
+
+    dedup_distance_label = tk.Label(dedup_frame, text="Max Hash Distance (0-64, higher skips more):", anchor="w")
+    dedup_distance_label.pack(fill="x")
+
+    dedup_distance_entry = tk.Entry(dedup_frame)
+    dedup_distance_entry.insert(0, "4")
+    dedup_distance_entry.pack(fill="x", pady=5)
+
+    # Dataset Split Frame
+    split_frame = tk.Frame(root)
+    split_frame.pack(fill="x", pady=5)
+
+    split_var = tk.BooleanVar(value=False)
+    split_check = tk.Checkbutton(split_frame, text="Split into train/valid/test (whole videos per subset)", variable=split_var, anchor="w")
+    split_check.pack(fill="x")
 
-root = TkinterDnD.Tk()
-root.title("Video Frame Extractor")
-root.geometry("400x700")
-root.configure(padx=10, pady=10)
+    train_ratio_label = tk.Label(split_frame, text="Train Ratio:", anchor="w")
+    train_ratio_label.pack(fill="x")
 
-# File Selection Frame
-file_frame = tk.Frame(root)
-file_frame.pack(fill="x", pady=5)
+    train_ratio_entry = tk.Entry(split_frame)
+    train_ratio_entry.insert(0, "0.7")
+    train_ratio_entry.pack(fill="x", pady=5)
 
-file_label = tk.Label(file_frame, text="Drag a video file here or click to select", anchor="w", bg="white", relief="solid")
-file_label.pack(fill="x", ipady=10)
-file_label.drop_target_register(DND_FILES)
-file_label.dnd_bind('<<Drop>>', drop_file)
-file_label.dnd_bind('<<DragEnter>>', lambda event: on_drag_enter(event, file_label))
-file_label.dnd_bind('<<DragLeave>>', lambda event: on_drag_leave(event, file_label))
+    valid_ratio_label = tk.Label(split_frame, text="Validation Ratio (test = remaining):", anchor="w")
+    valid_ratio_label.pack(fill="x")
 
-file_button = tk.Button(file_frame, text="Select Video File", command=select_file)
-file_button.pack(pady=5)
+    valid_ratio_entry = tk.Entry(split_frame)
+    valid_ratio_entry.insert(0, "0.2")
+    valid_ratio_entry.pack(fill="x", pady=5)
 
-# Folder Selection Frame
-folder_frame = tk.Frame(root)
-folder_frame.pack(fill="x", pady=5)
+    # Parallelism Options Frame
+    batch_options_frame = tk.Frame(root)
+    batch_options_frame.pack(fill="x", pady=5)
 
-folder_label = tk.Label(folder_frame, text="Drag a folder here or click to select", anchor="w", bg="white", relief="solid")
-folder_label.pack(fill="x", ipady=10)
-folder_label.drop_target_register(DND_FILES)
-folder_label.dnd_bind('<<Drop>>', drop_folder)
-folder_label.dnd_bind('<<DragEnter>>', lambda event: on_drag_enter(event, folder_label))
-folder_label.dnd_bind('<<DragLeave>>', lambda event: on_drag_leave(event, folder_label))
+    workers_label = tk.Label(batch_options_frame, text="Worker Processes:", anchor="w")
+    workers_label.pack(fill="x")
 
-folder_button = tk.Button(folder_frame, text="Select Folder for Batch Processing", command=select_folder)
-folder_button.pack(pady=5)
+    workers_entry = tk.Entry(batch_options_frame)
+    workers_entry.insert(0, str(os.cpu_count() or 1))
+    workers_entry.pack(fill="x", pady=5)
 
-# Sample Rate Frame
-sample_rate_frame = tk.Frame(root)
-sample_rate_frame.pack(fill="x", pady=5)
+    segments_label = tk.Label(batch_options_frame, text="Segments per Video (split long videos across workers):", anchor="w")
+    segments_label.pack(fill="x")
 
-sample_rate_label = tk.Label(sample_rate_frame, text="Enter Sample Rate (fps):", anchor="w")
-sample_rate_label.pack(fill="x")
+    segments_entry = tk.Entry(batch_options_frame)
+    segments_entry.insert(0, "1")
+    segments_entry.pack(fill="x", pady=5)
 
-sample_rate_entry = tk.Entry(sample_rate_frame)
-sample_rate_entry.pack(fill="x", pady=5)
+    encode_threads_label = tk.Label(batch_options_frame, text="Encoder Threads per Video (0 = no pipeline):", anchor="w")
+    encode_threads_label.pack(fill="x")
 
-# Rotation Option Frame
-rotation_frame = tk.Frame(root)
-rotation_frame.pack(fill="x", pady=5)
+    encode_threads_entry = tk.Entry(batch_options_frame)
+    encode_threads_entry.insert(0, "0")
+    encode_threads_entry.pack(fill="x", pady=5)
 
-rotation_label = tk.Label(rotation_frame, text="Select Rotation:", anchor="w")
-rotation_label.pack(fill="x")
+    queue_size_label = tk.Label(batch_options_frame, text="Pipeline Queue Depth (frames):", anchor="w")
+    queue_size_label.pack(fill="x")
 
-rotation_var = tk.StringVar(value="No Rotation")
-rotation_options = ["No Rotation", "Rotate Left 90°", "Rotate Right 90°"]
-rotation_menu = tk.OptionMenu(rotation_frame, rotation_var, *rotation_options)
-rotation_menu.pack(fill="x", pady=5)
+    queue_size_entry = tk.Entry(batch_options_frame)
+    queue_size_entry.insert(0, "16")
+    queue_size_entry.pack(fill="x", pady=5)
 
-# Compression Slider Frame
-compression_frame = tk.Frame(root)
-compression_frame.pack(fill="x", pady=5)
+    recursive_var = tk.BooleanVar(value=False)
+    recursive_check = tk.Checkbutton(batch_options_frame, text="Include subfolders", variable=recursive_var, anchor="w")
+    recursive_check.pack(fill="x")
 
-compression_label = tk.Label(compression_frame, text="JPEG Compression Level (0-100):", anchor="w")
-compression_label.pack(fill="x")
+    resume_var = tk.BooleanVar(value=True)
+    resume_check = tk.Checkbutton(batch_options_frame, text="Skip finished videos and resume interrupted ones", variable=resume_var, anchor="w")
+    resume_check.pack(fill="x")
 
-compression_slider = tk.Scale(compression_frame, from_=0, to=100, orient="horizontal", tickinterval=10)
-compression_slider.set(90)  # Default value for high quality
-compression_slider.pack(fill="x", pady=5)
+    # Process Buttons
+    process_frame = tk.Frame(root)
+    process_frame.pack(fill="x", pady=10)
 
-# Process Buttons
-process_frame = tk.Frame(root)
-process_frame.pack(fill="x", pady=10)
+    process_button = tk.Button(process_frame, text="Process Video", command=process_video)
+    process_button.pack(fill="x", pady=5)
 
-process_button = tk.Button(process_frame, text="Process Video", command=process_video)
-process_button.pack(fill="x", pady=5)
+    batch_button = tk.Button(process_frame, text="Batch Process Folder", command=batch_process)
+    batch_button.pack(fill="x", pady=5)
 
-batch_button = tk.Button(process_frame, text="Batch Process Folder", command=batch_process)
-batch_button.pack(fill="x", pady=5)
+    profile_button = tk.Button(process_frame, text="Save Settings as Profile (for watch-folder.py)", command=save_settings_profile)
+    profile_button.pack(fill="x", pady=5)
 
-# Status Label
-status_label = tk.Label(root, text="Status: Idle", anchor="w", relief="sunken")
-status_label.pack(fill="x", pady=10)
+    # Status Label
+    status_label = tk.Label(root, text="Status: Idle", anchor="w", relief="sunken", justify="left", wraplength=380)
+    status_label.pack(fill="x", pady=10)
 
-root.mainloop()
+    root.mainloop()
@@ -3,6 +3,9 @@ from tkinter import filedialog
 import cv2
 import os
 
+from dataset_index import frame_stem
+from frame_extraction import iter_sampled_frames
+
 # Default directory
 default_dir = "/home/chucklab/Data/"
 
@@ -22,38 +25,36 @@ def extract_frames(video_path, sample_rate, output_folder,rotation):
         status_label.config(text=f"Error: Cannot open video {video_path}")
         return
 
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    interval = int(fps / sample_rate)
-
     base_name = os.path.splitext(os.path.basename(video_path))[0]
     os.makedirs(output_folder, exist_ok=True)
 
-    count = 0                                                                                            
-    while True:                       
-        ret, frame = cap.read()                                                                          
-        if not ret:                                                                                      
-            break                                                                                        
-        if count % interval == 0:                                                                        
-            if rotation == "Rotate Left 90°":
-                frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)                                
-            elif rotation == "Rotate Right 90°":                                                         
-                frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)                                       
-            frame_name = f"{base_name}_frame_{count // interval}.jpg"                                    
-            frame_path = os.path.join(output_folder, frame_name)                                         
-            cv2.imwrite(frame_path, frame)                                                               
-        count += 1 
+    for index, frame in iter_sampled_frames(cap, sample_rate):
+        if rotation == "Rotate Left 90°":
+            frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
+        elif rotation == "Rotate Right 90°":
+            frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+        frame_name = frame_stem(base_name, index) + ".jpg"
+        frame_path = os.path.join(output_folder, frame_name)
+        cv2.imwrite(frame_path, frame)
     cap.release()
 
+def parse_sample_rate(value):
+    try:
+        sample_rate = float(value)
+    except ValueError:
+        return None
+    return sample_rate if sample_rate > 0 else None
+
 def batch_process():
     folder_path = folder_label.cget("text")
     sample_rate = sample_rate_entry.get()
     rotation = rotation_var.get()
 
-    if not sample_rate.isdigit() or int(sample_rate) <= 0:
-        status_label.config(text="Please enter a valid positive integer for the sample rate.")
+    sample_rate = parse_sample_rate(sample_rate)
+    if sample_rate is None:
+        status_label.config(text="Please enter a valid positive number for the sample rate.")
         return
 
-    sample_rate = int(sample_rate)
     output_folder = os.path.join(folder_path, "output")
     video_files = [f for f in os.listdir(folder_path) if f.endswith((".mp4", ".avi", ".mkv", ".mov", ".flv", ".wmv", ".mpeg", ".mpg", ".3gp"))]
 
@@ -69,11 +70,11 @@ def process_video():
     sample_rate = sample_rate_entry.get()
     rotation = rotation_var.get()
 
-    if not sample_rate.isdigit() or int(sample_rate) <= 0:
-        status_label.config(text="Please enter a valid positive integer for the sample rate.")
+    sample_rate = parse_sample_rate(sample_rate)
+    if sample_rate is None:
+        status_label.config(text="Please enter a valid positive number for the sample rate.")
         return
 
-    sample_rate = int(sample_rate)
     base_name = os.path.splitext(os.path.basename(file_path))[0]
     output_folder = os.path.join(os.path.dirname(file_path), f"{base_name}_frames")
     status_label.config(text="Processing video...")
@@ -1,8 +1,14 @@
 import tkinter as tk
 from tkinter import filedialog
 from PIL import Image
+import numpy as np
 import os
 
+from image_encoders import make_encoder
+
+# Input extensions the shared encoders can write back in their own format; others are saved by PIL
+SAME_FORMATS = {".jpg": "jpeg", ".jpeg": "jpeg", ".png": "png", ".webp": "webp"}
+
 def select_file():
     file_path = filedialog.askopenfilename()
     if file_path:
@@ -25,13 +31,36 @@ def rotate_image(image_path, rotation):
     
     return img
 
-def process_images(image_paths, rotation, output_folder):
+def to_array(img, keep_alpha):
+    # The shared encoders take OpenCV-style BGR(A) or grayscale arrays
+    if img.mode == "L":
+        return np.asarray(img)
+    if keep_alpha and img.mode in ("RGBA", "LA", "P"):
+        return np.asarray(img.convert("RGBA"))[:, :, [2, 1, 0, 3]]
+    return np.asarray(img.convert("RGB"))[:, :, ::-1]
+
+def process_images(image_paths, rotation, output_folder, image_format="same", quality=75):
+    """Rotate images into output_folder, encoding them as image_format ("same" keeps each input's format)."""
     os.makedirs(output_folder, exist_ok=True)
     for image_path in image_paths:
         img = rotate_image(image_path, rotation)
-        base_name = os.path.basename(image_path)
-        output_path = os.path.join(output_folder, base_name)
-        img.save(output_path)
+        stem, input_extension = os.path.splitext(os.path.basename(image_path))
+        if image_format == "same":
+            if input_extension.lower() not in SAME_FORMATS:
+                img.save(os.path.join(output_folder, stem + input_extension))
+                continue
+            _, encode = make_encoder(SAME_FORMATS[input_extension.lower()], quality)
+            extension = input_extension
+        else:
+            extension, encode = make_encoder(image_format, quality)
+        array = to_array(img, keep_alpha=extension.lower() in (".png", ".webp"))
+        output_path = os.path.join(output_folder, stem + extension)
+        with open(output_path, "wb") as f:
+            f.write(encode(array))
+
+def read_format():
+    value = format_var.get()
+    return "same" if value == "Same as Input" else value.lower()
 
 def process_file():
     file_path = file_label.cget("text")
@@ -42,7 +71,7 @@ def process_file():
         return
     
     output_folder = os.path.join(os.path.dirname(file_path), "rotated")
-    process_images([file_path], rotation, output_folder)
+    process_images([file_path], rotation, output_folder, read_format(), quality_slider.get())
     
     status_label.config(text=f"Image saved to {output_folder}")
 
@@ -58,7 +87,7 @@ def batch_process():
     image_paths = [os.path.join(folder_path, f) for f in image_files]
     output_folder = os.path.join(folder_path, "rotated")
     
-    process_images(image_paths, rotation, output_folder)
+    process_images(image_paths, rotation, output_folder, read_format(), quality_slider.get())
     
     status_label.config(text=f"Images saved to {output_folder}")
 
@@ -86,6 +115,21 @@ rotation_options = ["Left 90°", "Right 90°", "Flip Vertical"]
 for option in rotation_options:
     tk.Radiobutton(root, text=option, variable=rotation_var, value=option).pack()
 
+format_label = tk.Label(root, text="Output Format:")
+format_label.pack()
+
+format_var = tk.StringVar(value="Same as Input")
+format_options = ["Same as Input", "JPEG", "TurboJPEG", "WebP", "PNG"]
+format_menu = tk.OptionMenu(root, format_var, *format_options)
+format_menu.pack()
+
+quality_label = tk.Label(root, text="JPEG/WebP Quality (0-100):")
+quality_label.pack()
+
+quality_slider = tk.Scale(root, from_=0, to=100, orient="horizontal")
+quality_slider.set(75)  # PIL's default, what this tool wrote before
+quality_slider.pack()
+
 process_button = tk.Button(root, text="Process Image", command=process_file)
 process_button.pack()
 
@@ -0,0 +1,126 @@
+"""Image encoders shared by the frame extractor and the image rotator.
+
+Every encoder turns a BGR (or grayscale) array into the bytes of an image
+file. Use make_encoder() to get one and run this module on a sample image to
+compare encode time and size:
+
+    python image_encoders.py sample.jpg [--repeats 20]
+"""
+import argparse
+import time
+
+import cv2
+
+# PyTurboJPEG is optional, the "turbojpeg" format falls back to OpenCV's JPEG encoder without it
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJPF_GRAY, TJSAMP_GRAY, TJSAMP_411, TJSAMP_420, TJSAMP_422, TJSAMP_444
+except ImportError:
+    TurboJPEG = None
+
+FORMATS = ("jpeg", "turbojpeg", "webp", "png")
+EXTENSIONS = {"jpeg": ".jpg", "turbojpeg": ".jpg", "webp": ".webp", "png": ".png"}
+SUBSAMPLING = ("444", "422", "420", "411")
+
+_turbojpeg = None
+
+def _get_turbojpeg():
+    # Loading libturbojpeg is slow and can fail even when the Python package is installed
+    global _turbojpeg
+    if _turbojpeg is None and TurboJPEG is not None:
+        try:
+            _turbojpeg = TurboJPEG()
+        except (OSError, RuntimeError):
+            _turbojpeg = False
+    return _turbojpeg or None
+
+def turbojpeg_available():
+    return _get_turbojpeg() is not None
+
+def _opencv_encoder(extension, params):
+    def encode(image):
+        ok, buffer = cv2.imencode(extension, image, params)
+        if not ok:
+            raise IOError(f"Cannot encode image as {extension}")
+        return buffer.tobytes()
+    return encode
+
+def make_encoder(image_format="jpeg", quality=90, png_compression=3, subsampling=None, optimize=False):
+    """Return (extension, encode) for an output format, where encode(image) gives the file bytes.
+
+    quality applies to JPEG and WebP (WebP above 100 is lossless), png_compression
+    is the zlib level 0-9, subsampling is one of SUBSAMPLING for JPEG (None keeps
+    the encoder default of 4:2:0) and optimize computes optimal Huffman tables
+    for OpenCV JPEG. "turbojpeg" falls back to OpenCV when libjpeg-turbo can't be loaded.
+    """
+    if image_format not in FORMATS:
+        raise ValueError(f"Unknown image format {image_format}, expected one of {', '.join(FORMATS)}")
+    extension = EXTENSIONS[image_format]
+    quality = int(quality)
+
+    if image_format == "turbojpeg" and turbojpeg_available():
+        jpeg = _get_turbojpeg()
+        samp = {"444": TJSAMP_444, "422": TJSAMP_422, "420": TJSAMP_420, "411": TJSAMP_411}[subsampling or "420"]
+
+        def encode(image):
+            if image.ndim == 2:
+                return jpeg.encode(image, quality=quality, pixel_format=TJPF_GRAY, jpeg_subsample=TJSAMP_GRAY)
+            return jpeg.encode(image, quality=quality, pixel_format=TJPF_BGR, jpeg_subsample=samp)
+        return extension, encode
+
+    if image_format in ("jpeg", "turbojpeg"):
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        if subsampling is not None:
+            factor = getattr(cv2, f"IMWRITE_JPEG_SAMPLING_FACTOR_{subsampling}")
+            params += [int(cv2.IMWRITE_JPEG_SAMPLING_FACTOR), int(factor)]
+        if optimize:
+            params += [int(cv2.IMWRITE_JPEG_OPTIMIZE), 1]
+        return extension, _opencv_encoder(extension, params)
+    if image_format == "webp":
+        return extension, _opencv_encoder(extension, [int(cv2.IMWRITE_WEBP_QUALITY), quality])
+    return extension, _opencv_encoder(extension, [int(cv2.IMWRITE_PNG_COMPRESSION), int(png_compression)])
+
+BENCHMARK_SETTINGS = [
+    ("jpeg q90", {"image_format": "jpeg", "quality": 90}),
+    ("jpeg q90 4:4:4", {"image_format": "jpeg", "quality": 90, "subsampling": "444"}),
+    ("jpeg q90 optimize", {"image_format": "jpeg", "quality": 90, "optimize": True}),
+    ("jpeg q75", {"image_format": "jpeg", "quality": 75}),
+    ("turbojpeg q90", {"image_format": "turbojpeg", "quality": 90}),
+    ("webp q90", {"image_format": "webp", "quality": 90}),
+    ("webp lossless", {"image_format": "webp", "quality": 101}),
+    ("png level 1", {"image_format": "png", "png_compression": 1}),
+    ("png level 9", {"image_format": "png", "png_compression": 9}),
+]
+
+def benchmark_encoders(image, repeats=20):
+    """Encode image with every BENCHMARK_SETTINGS entry and return (name, ms per image, bytes per image) rows."""
+    rows = []
+    for name, settings in BENCHMARK_SETTINGS:
+        if settings["image_format"] == "turbojpeg" and not turbojpeg_available():
+            continue
+        _, encode = make_encoder(**settings)
+        encode(image)  # Warm up
+        start = time.perf_counter()
+        for _ in range(repeats):
+            size = len(encode(image))
+        rows.append((name, (time.perf_counter() - start) * 1000 / repeats, size))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare encode time and size of the available image encoders.")
+    parser.add_argument("image", help="sample image, ideally a typical extracted frame")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image)
+    if image is None:
+        parser.error(f"Cannot read image {args.image}")
+    if not turbojpeg_available():
+        print("libjpeg-turbo (PyTurboJPEG) is not available, skipping turbojpeg.")
+
+    print(f"{image.shape[1]}x{image.shape[0]}, {args.repeats} repeats\n")
+    print(f"{'encoder':<20} {'ms/frame':>9} {'bytes/frame':>12}")
+    for name, ms, size in benchmark_encoders(image, args.repeats):
+        print(f"{name:<20} {ms:>9.2f} {size:>12}")
+
+if __name__ == "__main__":
+    main()
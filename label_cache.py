@@ -0,0 +1,147 @@
+"""Binary cache of all YOLO labels of a dataset, for loading them in milliseconds.
+
+The cache is one uncompressed .npz file next to the labels folder, holding the
+parsed labels as contiguous arrays: float32 boxes, int32 class ids and the
+column count of every label line, plus the start offset of every file's
+lines. It records each file's size and modification time, so an update only
+parses the label files that are new or changed and copies the rest over as
+array slices.
+"""
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from dataset_index import LABEL_CACHE_NAME
+from dataset_labels import READ_THREADS, LabelArrays, parse_labels, read_sources
+from dataset_lists import CLASSES_FILE
+
+CACHE_VERSION = 2  # 2: values no longer shift after a token with Unicode whitespace
+
+# names, sizes and mtimes (ns) have one entry per label file; the lines of file i
+# are offsets[i]:offsets[i + 1] of classes, boxes and columns (see LabelArrays).
+LabelCache = namedtuple("LabelCache", ["names", "sizes", "mtimes", "offsets", "classes", "boxes", "columns"])
+
+def label_cache_path(labels_folder):
+    """Return the cache path of a labels folder: next to it for a dataset's labels folder, else inside it."""
+    labels_folder = os.path.normpath(labels_folder)
+    if os.path.basename(labels_folder) == "labels":
+        return os.path.join(os.path.dirname(labels_folder), LABEL_CACHE_NAME)
+    return os.path.join(labels_folder, LABEL_CACHE_NAME)
+
+def empty_cache():
+    return LabelCache(np.array([], dtype=str), np.array([], dtype=np.int64), np.array([], dtype=np.int64),
+                      np.zeros(1, dtype=np.int64), np.array([], dtype=np.int32),
+                      np.zeros((0, 4), dtype=np.float32), np.array([], dtype=np.int16))
+
+def load_label_cache(cache_path):
+    """Return the LabelCache stored at cache_path, or None if it is missing, unreadable or outdated."""
+    try:
+        with np.load(cache_path, allow_pickle=False) as data:
+            if int(data["version"]) != CACHE_VERSION:
+                return None
+            return LabelCache(*(data[field] for field in LabelCache._fields))
+    except (OSError, KeyError, ValueError):
+        return None
+
+def save_label_cache(cache_path, cache):
+    # Write next to the target and rename, so readers never see half a cache
+    temp_path = cache_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        np.savez(f, version=CACHE_VERSION, **cache._asdict())
+    os.replace(temp_path, cache_path)
+
+def list_labels(labels_folder):
+    """Return {label file name: (size, mtime_ns)} of the .txt files in labels_folder, without classes.txt."""
+    listing = {}
+    try:
+        with os.scandir(labels_folder) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(".txt") and entry.name != CLASSES_FILE and entry.is_file():
+                    stat = entry.stat()
+                    listing[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    except FileNotFoundError:
+        pass
+    return listing
+
+def line_ranges(offsets, files):
+    """Return the line indices of the given files and how many lines each has."""
+    starts = offsets[files]
+    counts = offsets[files + 1] - starts
+    lines = np.arange(counts.sum()) + np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+    return lines, counts
+
+def update_label_cache(labels_folder, threads=READ_THREADS):
+    """Bring the cache of labels_folder up to date and return (LabelCache, label files parsed).
+
+    If nothing changed nothing is parsed or written. A read-only dataset still
+    gets an up-to-date cache for this run, it just isn't saved.
+    """
+    cache_path = label_cache_path(labels_folder)
+    old = load_label_cache(cache_path) or empty_cache()
+    listing = list_labels(labels_folder)
+    names = sorted(listing)
+    sizes = np.array([listing[name][0] for name in names], dtype=np.int64)
+    mtimes = np.array([listing[name][1] for name in names], dtype=np.int64)
+
+    # Position of every file in the old cache, -1 if it is new or changed
+    old_positions = {name: i for i, name in enumerate(old.names.tolist())}
+    positions = np.array([old_positions.get(name, -1) for name in names], dtype=np.int64)
+    known = positions >= 0
+    known[known] = (old.sizes[positions[known]] == sizes[known]) & (old.mtimes[positions[known]] == mtimes[known])
+    if known.all() and len(names) == len(old.names):
+        return old, 0
+
+    stale = np.flatnonzero(~known)
+    parsed = parse_labels(read_sources([os.path.join(labels_folder, names[i]) for i in stale], threads))
+    stale_offsets = np.searchsorted(parsed.image_ids, np.arange(len(stale) + 1))
+
+    # Lines per file, from the old cache or the fresh parse, then both copied into place in file order
+    counts = np.zeros(len(names), dtype=np.int64)
+    old_lines, counts[known] = line_ranges(old.offsets, positions[known])
+    counts[stale] = np.diff(stale_offsets)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    target_known = line_ranges(offsets, np.flatnonzero(known))[0]
+    target_stale = line_ranges(offsets, stale)[0]
+
+    total = int(offsets[-1])
+    classes = np.empty(total, dtype=np.int32)
+    boxes = np.empty((total, 4), dtype=np.float32)
+    columns = np.empty(total, dtype=np.int16)
+    for array, old_array, new_array in ((classes, old.classes, parsed.classes), (boxes, old.boxes, parsed.boxes),
+                                        (columns, old.columns, parsed.columns)):
+        array[target_known] = old_array[old_lines]
+        array[target_stale] = new_array
+    cache = LabelCache(np.array(names, dtype=str), sizes, mtimes, offsets, classes, boxes, columns)
+    try:
+        save_label_cache(cache_path, cache)
+    except OSError:
+        pass
+    return cache, len(stale)
+
+def file_positions(cache, names):
+    """Return the position in the cache of every label file name, -1 for None or a name it doesn't hold."""
+    positions = {name: i for i, name in enumerate(cache.names.tolist())}
+    return np.array([positions.get(name, -1) if name is not None else -1 for name in names], dtype=np.int64)
+
+def file_labels(cache, files):
+    """Return LabelArrays for cache positions from file_positions, image ids numbering them from 0."""
+    present = np.flatnonzero(files >= 0)
+    lines, counts = line_ranges(cache.offsets, files[present])
+    return LabelArrays(np.repeat(present, counts).astype(np.int32), cache.classes[lines], cache.boxes[lines],
+                       cache.columns[lines])
+
+def cache_labels(cache, names):
+    """Return LabelArrays for a list of label file names (None for images without a label), in that order."""
+    return file_labels(cache, file_positions(cache, names))
+
+def cached_labels(labels_folder, names, threads=READ_THREADS):
+    """Update the cache of labels_folder and return (LabelArrays for names, label files parsed)."""
+    cache, parsed = update_label_cache(labels_folder, threads)
+    return cache_labels(cache, names), parsed
+
+def files_with_classes(cache, class_ids):
+    """Return the names of cached label files with a line of one of class_ids or an unreadable class id."""
+    lines = np.flatnonzero(np.isin(cache.classes, list(class_ids)) | (cache.classes < 0))
+    files = np.unique(np.searchsorted(cache.offsets, lines, side="right") - 1)
+    return set(cache.names[files].tolist())
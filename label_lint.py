@@ -0,0 +1,205 @@
+"""Check every YOLO label of a dataset for the mistakes trainers only warn about hours into a run.
+
+All labels are loaded through the label cache and every check is one NumPy
+operation over all boxes at once:
+
+    python label_lint.py dataset [--classes 80] [--report lint_report.json] [--fix]
+
+dataset is a folder with images/ and labels/ (labels without an image are
+reported too) or a plain folder of label files. The class count comes from
+--classes or the dataset's classes.txt. Segmentation polygon lines (class
+followed by 3 or more x y pairs) are accepted; only their class id is
+checked. --fix rewrites the broken labels: coordinates are clipped to [0, 1],
+and lines with a wrong column count, an invalid class, no area or an exact
+duplicate are removed. A file is only rewritten if its lines still match
+what was checked. Labels without an image are moved to orphaned_labels/
+instead of being deleted.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from dataset_index import orphaned_labels, scan_dataset
+from dataset_lists import load_class_names
+from label_cache import READ_THREADS, update_label_cache
+from label_remap import write_atomic
+
+REPORT_NAME = "lint_report.json"
+ORPHAN_FOLDER = "orphaned_labels"
+
+# Check name -> what it means, in report order
+CHECKS = {
+    "columns": "line is neither a box (class x y w h) nor a polygon (class x1 y1 x2 y2 x3 y3 ...)",
+    "unparsable": "a value is not a number",
+    "class": "class id is not a whole number in range",
+    "out_of_range": "a coordinate is outside [0, 1]",
+    "zero_area": "box width or height is 0 or less",
+    "duplicate": "same class and box as an earlier line of the file",
+}
+# Issues --fix can repair in place instead of removing the line
+CLIPPABLE = {"out_of_range"}
+
+def find_issues(cache, class_count=None):
+    """Return {check name: boolean array over all cached label lines}."""
+    boxes = cache.boxes
+    is_box = cache.columns == 5
+    is_polygon = (cache.columns >= 7) & (cache.columns % 2 == 1)
+    nan = np.isnan(boxes).any(axis=1)
+    issues = {"columns": ~is_box & ~is_polygon, "unparsable": is_box & nan}
+    bad_class = cache.classes < 0
+    if class_count is not None:
+        bad_class |= cache.classes >= class_count
+    issues["class"] = bad_class
+    with np.errstate(invalid="ignore"):
+        issues["out_of_range"] = is_box & ((boxes < 0) | (boxes > 1)).any(axis=1)
+        issues["zero_area"] = is_box & ~nan & ((boxes[:, 2] <= 0) | (boxes[:, 3] <= 0))
+
+    # Duplicates: same file, class and box bits, every occurrence after the first
+    files = np.repeat(np.arange(len(cache.names)), np.diff(cache.offsets))
+    keys = np.column_stack((files, cache.classes, np.ascontiguousarray(boxes).view(np.int32)))
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    issues["duplicate"] = is_box & (first[inverse.ravel()] != np.arange(len(keys)))
+    return issues
+
+def lint_dataset(folder, class_count=None, threads=READ_THREADS):
+    """Return (report dict, cache, issues) for a dataset folder or a plain labels folder."""
+    start = time.perf_counter()
+    is_dataset = os.path.isdir(os.path.join(folder, "labels"))
+    labels_folder = os.path.join(folder, "labels") if is_dataset else folder
+    if class_count is None:
+        names = load_class_names(folder if is_dataset else os.path.dirname(os.path.normpath(folder)))
+        class_count = len(names) if names else None
+    cache, parsed = update_label_cache(labels_folder, threads)
+    issues = find_issues(cache, class_count)
+
+    # Per file: which checks failed and at which box (the n-th non-empty line)
+    any_issue = np.logical_or.reduce(list(issues.values())) if len(cache.classes) else np.zeros(0, dtype=bool)
+    lines = np.flatnonzero(any_issue)
+    files = np.searchsorted(cache.offsets, lines, side="right") - 1
+    problems = {}
+    for line, file in zip(lines.tolist(), files.tolist()):
+        failed = [check for check, mask in issues.items() if mask[line]]
+        problems.setdefault(cache.names[file], []).append({"box": line - int(cache.offsets[file]), "checks": failed})
+
+    report = {
+        "folder": os.path.abspath(folder),
+        "class_count": class_count,
+        "label_files": len(cache.names),
+        "boxes": int(len(cache.classes)),
+        "parsed": parsed,
+        "issues": {check: int(mask.sum()) for check, mask in issues.items()},
+        "checks": CHECKS,
+        "files": problems,
+    }
+    if is_dataset:
+        index = scan_dataset(folder)
+        report["orphaned_labels"] = [index.labels[stem] for stem in orphaned_labels(index)]
+        report["images_without_labels"] = len(index.images.keys() - index.labels.keys())
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    return report, cache, issues
+
+def clip_boxes(boxes):
+    """Return boxes cut to the image: corners clipped to [0, 1], then back to center and size."""
+    corners = np.clip(np.concatenate((boxes[:, :2] - boxes[:, 2:] / 2, boxes[:, :2] + boxes[:, 2:] / 2), axis=1), 0, 1)
+    return np.concatenate(((corners[:, :2] + corners[:, 2:]) / 2, corners[:, 2:] - corners[:, :2]), axis=1)
+
+def matches_cache(lines, cache, file):
+    # The file's non-empty lines and their token counts must be the ones the checks ran on
+    columns = [len(line.split()) for line in lines if line.split()]
+    return columns == cache.columns[cache.offsets[file]:cache.offsets[file + 1]].tolist()
+
+def fix_labels(labels_folder, cache, issues):
+    """Rewrite the label files with issues and return (files rewritten, lines removed, boxes clipped, skipped).
+
+    Files whose lines no longer match the cache (changed since the check) are left alone and listed in skipped.
+    """
+    drop = np.logical_or.reduce([mask for check, mask in issues.items() if check not in CLIPPABLE])
+    clip = np.logical_or.reduce([issues[check] for check in CLIPPABLE]) & ~drop
+    clipped_boxes = clip_boxes(cache.boxes[clip].astype(np.float64))
+    # A box entirely outside the image has nothing left after clipping
+    empty = (clipped_boxes[:, 2:] <= 0).any(axis=1)
+    drop[np.flatnonzero(clip)[empty]] = True
+    clip[np.flatnonzero(clip)[empty]] = False
+    replacements = dict(zip(np.flatnonzero(clip).tolist(), clipped_boxes[~empty].tolist()))
+
+    affected = np.unique(np.searchsorted(cache.offsets, np.flatnonzero(drop | clip), side="right") - 1)
+    rewritten = removed = clipped = 0
+    skipped = []
+    for file in affected.tolist():
+        path = os.path.join(labels_folder, cache.names[file])
+        with open(path, "rb") as f:
+            lines = f.read().split(b"\n")
+        if not matches_cache(lines, cache, file):
+            skipped.append(str(cache.names[file]))
+            continue
+        # Rows count the non-empty lines, as the parser does; good lines keep their text as is
+        row = int(cache.offsets[file])
+        out = []
+        for line in lines:
+            if not line.split():
+                out.append(line)
+                continue
+            if row in replacements:
+                out.append(line.split()[0] + b" " + " ".join(f"{value:.6g}" for value in replacements[row]).encode())
+                clipped += 1
+            elif not drop[row]:
+                out.append(line)
+            else:
+                removed += 1
+            row += 1
+        write_atomic(path, b"\n".join(out))
+        rewritten += 1
+    return rewritten, removed, clipped, skipped
+
+def move_orphans(folder, names):
+    """Move labels without an image to folder/orphaned_labels and return how many were moved."""
+    target = os.path.join(folder, ORPHAN_FOLDER)
+    os.makedirs(target, exist_ok=True)
+    for name in names:
+        shutil.move(os.path.join(folder, "labels", name), os.path.join(target, name))
+    return len(names)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folder", help="dataset folder with images/ and labels/, or a folder of label files")
+    parser.add_argument("--classes", type=int, help="number of classes (default: from classes.txt)")
+    parser.add_argument("--report", help=f"JSON report path (default: <folder>/{REPORT_NAME})")
+    parser.add_argument("--fix", action="store_true", help="repair the labels and move orphaned labels aside")
+    parser.add_argument("--threads", type=int, default=READ_THREADS, help="threads reading label files")
+    args = parser.parse_args()
+    if not os.path.isdir(args.folder):
+        parser.error(f"{args.folder} is not a folder")
+
+    report, cache, issues = lint_dataset(args.folder, args.classes, args.threads)
+    report_path = args.report or os.path.join(args.folder, REPORT_NAME)
+    print(f"{report['label_files']} label files, {report['boxes']} boxes checked in {report['seconds']} s "
+          f"({report['parsed']} parsed, the rest from the label cache)")
+    for check, count in report["issues"].items():
+        print(f"{check:<14} {count:>9}  {CHECKS[check]}")
+    if "orphaned_labels" in report:
+        print(f"{'orphaned':<14} {len(report['orphaned_labels']):>9}  label without an image")
+        print(f"{'background':<14} {report['images_without_labels']:>9}  images without a label (not an error)")
+    if report["class_count"] is None:
+        print("No class count given and no classes.txt found, class ids were only checked for being whole numbers.")
+
+    if args.fix:
+        labels_folder = os.path.join(args.folder, "labels") if "orphaned_labels" in report else args.folder
+        files, removed, clipped, skipped = fix_labels(labels_folder, cache, issues)
+        print(f"\nFixed {files} files: {removed} lines removed, {clipped} boxes clipped to the image")
+        if skipped:
+            print(f"Left {len(skipped)} files alone, they changed since they were checked; run the lint again")
+        if report.get("orphaned_labels"):
+            moved = move_orphans(args.folder, report["orphaned_labels"])
+            print(f"Moved {moved} orphaned labels to {os.path.join(args.folder, ORPHAN_FOLDER)}")
+        report["fixed"] = {"files": files, "lines_removed": removed, "boxes_clipped": clipped, "skipped": skipped}
+
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport: {report_path}")
+
+if __name__ == "__main__":
+    main()
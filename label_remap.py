@@ -0,0 +1,141 @@
+"""Change, merge or delete class ids in YOLO label files.
+
+A mapping such as {1: 0, 2: 0, 5: None} turns classes 1 and 2 into 0 and
+deletes every class 5 box. Files are handled in chunks on a process pool,
+and each file is first scanned for the affected class ids with one regular
+expression over its bytes, so files without them are never parsed or written.
+Changed files are written to a temporary file and renamed over the original,
+so an interrupted run never leaves a half-written label behind.
+"""
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dataset_lists import CLASSES_FILE
+
+CHUNK_SIZE = 512
+DELETE_WORDS = ("delete", "drop", "-")
+
+def parse_mapping(text):
+    """Parse "1:0, 2:0, 5:delete" (or "1->0") into {1: 0, 2: 0, 5: None}."""
+    mapping = {}
+    for item in re.split(r"[,;\n]+", text):
+        if not item.strip():
+            continue
+        parts = re.split(r"->|:|=", item)
+        if len(parts) != 2:
+            raise ValueError(f"Invalid mapping entry '{item.strip()}', expected e.g. 1:0 or 5:delete")
+        source, target = parts[0].strip(), parts[1].strip().lower()
+        if not source.isdigit() or not (target.isdigit() or target in DELETE_WORDS):
+            raise ValueError(f"Invalid mapping entry '{item.strip()}', class ids must be whole numbers")
+        if int(source) in mapping:
+            raise ValueError(f"Class {source} is mapped twice")
+        mapping[int(source)] = None if target in DELETE_WORDS else int(target)
+    if not mapping:
+        raise ValueError("The mapping is empty")
+    return mapping
+
+def describe_mapping(mapping):
+    return ", ".join(f"{source} -> {'delete' if target is None else target}" for source, target in sorted(mapping.items()))
+
+def prescan_pattern(mapping):
+    """Return a bytes regex that finds a line starting with any class id of mapping."""
+    classes = b"|".join(str(class_id).encode() for class_id in sorted(mapping, reverse=True))
+    return re.compile(rb"(?m)^[ \t]*0*(?:" + classes + rb")(?:[ \t]|\r?$)")
+
+def remap_data(data, mapping):
+    """Return (new bytes, changed lines, deleted lines) of label bytes."""
+    lines = data.split(b"\n")
+    out = []
+    changed = deleted = 0
+    for line in lines:
+        stripped = line.lstrip(b" \t")
+        token = stripped.split(None, 1)[0] if stripped.strip() else b""
+        if token.isdigit() and int(token) in mapping:
+            target = mapping[int(token)]
+            if target is None:
+                deleted += 1
+                continue
+            if target != int(token):
+                line = str(target).encode() + stripped[len(token):]
+                changed += 1
+        out.append(line)
+    if not deleted and not changed:
+        return data, 0, 0
+    return b"\n".join(out), changed, deleted
+
+def write_atomic(path, data):
+    """Replace path with data through a temporary file in the same folder, keeping its permission bits."""
+    folder, name = os.path.split(path)
+    descriptor, temp_path = tempfile.mkstemp(dir=folder or ".", prefix=f".{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(data)
+        shutil.copymode(path, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def remap_chunk(paths, mapping, dry_run=False):
+    """Remap a list of label files and return [(path, changed lines, deleted lines, error), ...] of touched files.
+
+    Runs in the pool workers; files the pre-scan rules out are left out of the result.
+    """
+    pattern = prescan_pattern(mapping)
+    results = []
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if not pattern.search(data):
+                continue
+            new_data, changed, deleted = remap_data(data, mapping)
+            if not changed and not deleted:
+                continue
+            if not dry_run:
+                write_atomic(path, new_data)
+            results.append((path, changed, deleted, None))
+        except OSError as e:
+            results.append((path, 0, 0, str(e)))
+    return results
+
+def find_label_files(folder, recursive=True):
+    """Return the .txt label files in folder (and its subfolders), without classes.txt."""
+    paths = []
+    for current, folders, files in os.walk(folder):
+        folders[:] = sorted(name for name in folders if not name.startswith("."))
+        paths.extend(os.path.join(current, name) for name in sorted(files)
+                     if name.lower().endswith(".txt") and name != CLASSES_FILE)
+        if not recursive:
+            break
+    return paths
+
+def remap_files(paths, mapping, dry_run=False, workers=None, progress=None):
+    """Remap label files on a process pool and return a stats dict.
+
+    The stats hold files, changed_files, changed_lines, deleted_lines and
+    errors, a list of (path, message). With dry_run nothing is written and
+    the stats count what would change. progress(done, total) is called
+    after every chunk.
+    """
+    stats = {"files": len(paths), "changed_files": 0, "changed_lines": 0, "deleted_lines": 0, "errors": []}
+    chunks = [paths[i:i + CHUNK_SIZE] for i in range(0, len(paths), CHUNK_SIZE)]
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = {pool.submit(remap_chunk, chunk, mapping, dry_run): len(chunk) for chunk in chunks}
+        for future in as_completed(futures):
+            for path, changed, deleted, error in future.result():
+                if error is not None:
+                    stats["errors"].append((path, error))
+                    continue
+                stats["changed_files"] += 1
+                stats["changed_lines"] += changed
+                stats["deleted_lines"] += deleted
+            done += futures[future]
+            if progress is not None:
+                progress(done, len(paths))
+    return stats
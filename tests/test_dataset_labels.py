@@ -0,0 +1,16 @@
+import numpy as np
+
+from dataset_labels import parse_labels
+
+def test_unicode_whitespace_does_not_shift_later_values():
+    # A non-breaking space is one token for the parser; it must not split the values of later lines or files
+    labels = parse_labels(["0 0.5 0.5 0.2 0.2\n1 0.1 0.1 0.1 0.1".encode(), b"2 0.3 0.4 0.05 0.06"])
+    assert labels.columns.tolist() == [4, 5, 5]
+    assert labels.classes.tolist() == [-1, 1, 2]
+    np.testing.assert_allclose(labels.boxes[1:], [[0.1, 0.1, 0.1, 0.1], [0.3, 0.4, 0.05, 0.06]], rtol=1e-6)
+
+def test_bad_tokens_become_nan():
+    labels = parse_labels([b"0 x 0.5 0.2 0.2\n\x1c1 0.1 0.1 0.1 0.1\n3 0.1 0.2 0.3 0.4"])
+    assert labels.classes.tolist() == [0, -1, 3]
+    assert np.isnan(labels.boxes[0, 0]) and not np.isnan(labels.boxes[0, 1:]).any()
+    np.testing.assert_allclose(labels.boxes[2], [0.1, 0.2, 0.3, 0.4], rtol=1e-6)
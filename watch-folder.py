@@ -0,0 +1,168 @@
+"""Watch a folder and extract frames from every new video as soon as it is fully written.
+
+Usage:
+    python watch-folder.py /data/cameras --profile profile.json [--output DIR] [--workers 4]
+                           [--interval 1] [--settle 5] [--recursive]
+
+The profile holds the extraction settings and is saved from image-extractor-drag.py
+with "Save Settings as Profile". A video is queued once its size and modification
+time have not changed for --settle seconds. Progress is kept in the same manifest
+as batch runs, so restarting the watcher never extracts a finished clip again and
+picks up interrupted ones where they stopped.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from frame_extraction import (MANIFEST_NAME, VIDEO_EXTENSIONS, _init_worker, extraction_params, load_manifest,
+                              load_profile, make_job, plan_video, progress_folder, record_video, resolve_targets,
+                              save_manifest, video_outputs)
+
+# inotify_simple is optional (Linux only), without it the folder is polled every --interval seconds
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+def log(message):
+    print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}", flush=True)
+
+def scan_videos(folder_path, recursive=False):
+    """Return {video path: (size, mtime)} for the videos in folder_path."""
+    videos = {}
+    folders = [folder_path]
+    while folders:
+        try:
+            entries = list(os.scandir(folders.pop()))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if recursive:
+                        folders.append(entry.path)
+                elif entry.name.endswith(VIDEO_EXTENSIONS):
+                    stat = entry.stat()
+                    videos[entry.path] = (stat.st_size, stat.st_mtime)
+            except FileNotFoundError:
+                pass  # Removed while scanning
+    return videos
+
+def make_waiter(folder_path):
+    """Return wait(timeout) which returns early when something changes in folder_path, if inotify is available."""
+    if INotify is None:
+        return time.sleep
+    inotify = INotify()
+    inotify.add_watch(folder_path, flags.CREATE | flags.MODIFY | flags.CLOSE_WRITE | flags.MOVED_TO)
+    return lambda timeout: inotify.read(timeout=int(timeout * 1000))
+
+def watch(folder_path, profile, output_folder, workers=1, interval=1.0, settle=5.0, recursive=False):
+    """Extract every video that appears in folder_path with the profile's settings, until interrupted."""
+    options = dict(profile)
+    sample_rate = options.pop("sample_rate", None)
+    rotation = options.pop("rotation", "No Rotation")
+    compression = options.pop("compression", 90)
+    targets = options.pop("targets", None)
+    segments = options.pop("segments", 1)
+    split = options.pop("split", None)
+    options.pop("workers", None)
+
+    manifest_folder = output_folder
+    if targets:
+        targets = resolve_targets(targets, folder_path)
+        manifest_folder = folder_path  # Job spec targets may write to several folders
+        segments = 1
+    manifest_path = os.path.join(manifest_folder, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    params = extraction_params(sample_rate, rotation, compression, targets, dict(options, split=split))
+    job = make_job(sample_rate, output_folder, rotation, compression, targets)
+    wait_for_changes = make_waiter(folder_path)
+
+    stable = {}     # video path -> (size, mtime) last seen and when it was first seen like that
+    done = set()    # (video path, size, mtime) finished, failed or skipped since the watcher started
+    pending = {}    # video path -> [segments left, written, dropped, error, signature]
+    futures = {}
+    log(f"Watching {folder_path} with {workers} workers, frames go to {output_folder}")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(1,)) as pool:
+        while True:
+            now = time.monotonic()
+            for video_path, signature in scan_videos(folder_path, recursive).items():
+                if (video_path,) + signature in done or video_path in pending:
+                    continue
+                seen = stable.get(video_path)
+                if seen is None or seen[0] != signature:
+                    stable[video_path] = (signature, now)
+                    continue
+                if now - seen[1] < settle or len(pending) >= workers:
+                    continue  # Still growing, or the pool is busy and the clip waits for the next round
+
+                del stable[video_path]
+                try:
+                    video_output, video_targets, subset = video_outputs(video_path, output_folder, targets, split,
+                                                                        bool(options.get("shard_mb")))
+                    plan = plan_video(video_path, manifest, dict(params, subset=subset), sample_rate, video_output,
+                                      segments, video_targets, options, progress=progress_folder(manifest_path))
+                except OSError as e:
+                    log(f"Cannot plan {video_path}: {e}")
+                    done.add((video_path,) + signature)
+                    continue
+                if plan is None:
+                    done.add((video_path,) + signature)
+                    continue
+                save_manifest(manifest_path, manifest)
+                calls, kept = plan
+                pending[video_path] = [len(calls), kept, 0, None, signature]
+                for call in calls:
+                    futures[pool.submit(job, video_path, threads=1, **call, **options)] = video_path
+                log(f"Queued {video_path}")
+
+            if not futures:
+                wait_for_changes(interval)
+                continue
+            finished, _ = wait(futures, timeout=interval, return_when=FIRST_COMPLETED)
+            for future in finished:
+                video_path = futures.pop(future)
+                state = pending[video_path]
+                state[0] -= 1
+                try:
+                    written, dropped = future.result()
+                    state[1] += written
+                    state[2] += dropped
+                except Exception as e:
+                    state[3] = e
+                if state[0] == 0:
+                    del pending[video_path]
+                    _, written, dropped, error, signature = state
+                    record_video(manifest, manifest_path, video_path, written, error)
+                    done.add((video_path,) + signature)
+                    if error is not None:
+                        log(f"Failed {video_path}: {error}")
+                    else:
+                        log(f"Finished {video_path}: {written} frames written, {dropped} near-duplicates skipped")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folder", help="folder the cameras drop new clips into")
+    parser.add_argument("--profile", required=True, help="parameter profile saved from image-extractor-drag.py")
+    parser.add_argument("--output", help="frame output folder (default: <folder>/output)")
+    parser.add_argument("--workers", type=int, help="videos extracted at once (default: the profile's workers)")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between folder scans")
+    parser.add_argument("--settle", type=float, default=5.0, help="seconds a file must stop growing before it is queued")
+    parser.add_argument("--recursive", action="store_true", help="also watch subfolders")
+    args = parser.parse_args()
+
+    try:
+        profile = load_profile(args.profile)
+    except (OSError, ValueError) as e:
+        parser.error(f"Cannot load profile: {e}")
+    workers = args.workers or profile.get("workers") or 1
+    output_folder = args.output or os.path.join(args.folder, "output")
+    try:
+        watch(args.folder, profile, output_folder, max(workers, 1), args.interval, args.settle, args.recursive)
+    except KeyboardInterrupt:
+        log("Stopped, interrupted videos resume on the next start.")
+
+if __name__ == "__main__":
+    main()